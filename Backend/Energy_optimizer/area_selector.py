@@ -1,11 +1,73 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request, Response
+import gzip
+import hashlib
 import json
 import os
+import threading
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
 
 app = Flask(__name__)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 AREA_JSON_PATH = os.path.join(BASE_DIR, "area_map.json")
 
+
+class StaticJSON:
+    """A JSON file held in memory as ready-to-send bytes.
+
+    The file is parsed once and re-read only when its mtime changes. The
+    compact encoding, its gzip/brotli variants and a strong ETag are all
+    computed at load time, so serving a request costs one stat().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self.variants = {}
+        self.etag = None
+
+    def _load(self, mtime):
+        with open(self.path, "r") as f:
+            body = json.dumps(json.load(f), separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        variants = {"identity": body, "gzip": gzip.compress(body, compresslevel=9)}
+        if brotli is not None:
+            variants["br"] = brotli.compress(body)
+        self.variants, self.etag, self._mtime = variants, digest, mtime
+
+    def current(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self._mtime:
+            with self._lock:
+                if mtime != self._mtime:
+                    self._load(mtime)
+        return self
+
+    def response(self, req):
+        """200 with the best encoding the client accepts, or 304 if its copy is current"""
+        self.current()
+        accepted = req.accept_encodings
+        encoding = next((e for e in ("br", "gzip") if e in self.variants and accepted[e]), "identity")
+        # Strong ETags must differ per encoding; any of them proves the client is current
+        etag = self.etag if encoding == "identity" else f"{self.etag}-{encoding}"
+        headers = {
+            "ETag": f'"{etag}"',
+            "Vary": "Accept-Encoding",
+            "Cache-Control": "public, max-age=0, must-revalidate",
+        }
+        if any(tag == self.etag or tag.startswith(f"{self.etag}-") for tag in req.if_none_match):
+            return Response(status=304, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(self.variants[encoding], mimetype="application/json", headers=headers)
+
+
+area_map = StaticJSON(AREA_JSON_PATH)
+
 @app.route("/", methods=["GET"])
 def welcome():
     return jsonify({"message": "Welcome to the Area Selector API!"})
@@ -13,9 +75,7 @@ def welcome():
 @app.route("/api/area-options", methods=["GET"])
 def get_static_area_map():
     try:
-        with open(AREA_JSON_PATH, "r") as f:
-            data = json.load(f)
-        return jsonify(data)
+        return area_map.response(request)
     except Exception as e:
         return jsonify({"error": f"Failed to load JSON: {str(e)}"}), 500
 
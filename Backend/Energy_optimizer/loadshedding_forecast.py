@@ -1,29 +1,35 @@
 import os
-import requests
 from dotenv import load_dotenv
 
+from loadshedding_service import get_area_events
+from outage_index import outage_index
+
 load_dotenv()
 
-ESKOM_TOKEN = os.getenv("ESKOM_TOKEN")
 AREA_ID = os.getenv("AREA_ID")
 
 def get_load_shedding_schedule(area_id=None):
     """
     Fetches the load shedding schedule for a given area ID.
     If no area ID is provided, it defaults to the AREA_ID from environment variables.
+    Events come from loadshedding_service, which caches them per area.
     """
     if not area_id:
         area_id = os.getenv("AREA_ID")  # Default to environment variable if area_id is not provided
 
-    url = "https://developer.sepush.co.za/business/2.0/area"
-    headers = {"Token": ESKOM_TOKEN}
-    params = {"id": area_id}
-
     try:
-        r = requests.get(url, headers=headers, params=params)
-        events = r.json().get("events", [])
+        events = get_area_events(area_id)
         if not events:
             return ["No load shedding today"]
         return [f"{e['note']} at {e['start']}" for e in events]
     except Exception as e:
-        return [f"Error: {str(e)}"]
\ No newline at end of file
+        return [f"Error: {str(e)}"]
+
+def get_next_load_shedding(area_id=None):
+    """
+    Returns the area's next load shedding event (or None), looked up in the
+    outage index once the area's schedule is cached.
+    """
+    area_id = area_id or AREA_ID
+    get_area_events(area_id)  # make sure the area's schedule is cached
+    return outage_index.next_event(area_id)
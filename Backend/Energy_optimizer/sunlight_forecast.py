@@ -1,7 +1,8 @@
 import os
-import requests
 from dotenv import load_dotenv
 
+import http_client
+
 load_dotenv()
 
 TOMORROW_IO_KEY = os.getenv("TOMORROW_IO_API_KEY")
@@ -16,7 +17,7 @@ def get_sunlight_hours():
         "apikey": TOMORROW_IO_KEY
     }
 
-    response = requests.get(url, params=params)
+    response = http_client.get(url, params=params)
     data = response.json()
 
     sunlight_hours = []
@@ -1,11 +1,12 @@
 from dotenv import load_dotenv
 import os
-import requests
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from hugging_services import HuggingFaceChatbot
 import logging
 from agent import EnergyUsageOptimizerAgent
+from area_catalogue import search_areas
+from loadshedding_service import search_areas_upstream
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -13,8 +14,6 @@ logger = logging.getLogger(__name__)
 
 load_dotenv()  # Load .env variables
 
-ESKOM_TOKEN = os.getenv("ESKOM_TOKEN")  # Added Eskom token loading
-
 app = Flask(__name__)
 CORS(app)
 
@@ -89,18 +88,28 @@ def optimize_energy():
 @app.route('/api/areas', methods=['GET'])  # Added Eskom areas endpoint
 def get_eskom_areas():
     """
-    Fetches Eskom areas based on search text.
+    Searches load-shedding areas by name.
+    Served from the local area catalogue; EskomSePush is only asked when
+    nothing local matches, and its results are added to the catalogue.
     """
     text = request.args.get("text", "")
     if not text:
         return {"error": "Please provide search text"}, 400
 
-    r = requests.get(
-        f"https://developer.sepush.co.za/business/2.0/areas_search?text={text}",
-        headers={"token": ESKOM_TOKEN}
-    )
-    data = r.json()
-    return data
+    limit = max(1, min(request.args.get("limit", 10, type=int), 50))
+    return {"areas": search_areas(text, limit, fetch_upstream=search_areas_upstream)}
+
+@app.route('/api/areas_search', methods=['GET'])
+def areas_search():
+    """
+    Same search as /api/areas, returned as a plain list (?query=).
+    """
+    query = request.args.get("query", "")
+    if not query:
+        return {"error": "Please provide a query"}, 400
+
+    limit = max(1, min(request.args.get("limit", 10, type=int), 50))
+    return jsonify(search_areas(query, limit, fetch_upstream=search_areas_upstream))
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
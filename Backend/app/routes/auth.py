@@ -1,7 +1,8 @@
 from flask import Blueprint, redirect, url_for, session, jsonify, request, current_app, render_template
 from app import oauth
-from support import get_user_by_email, create_user
-from werkzeug.security import check_password_hash, generate_password_hash
+from support import get_user_by_email, create_user, update_password_hash
+from password_hashing import (hash_password, verify_password, needs_rehash,
+                              HashingBusyError, RETRY_AFTER_SECONDS)
 import os
 import time
 import logging
@@ -23,6 +24,9 @@ logging.basicConfig(
 def create_response(message=None, status=200):
     return jsonify({"message": message}), status
 
+def busy_response():
+    return jsonify({"message": "Server is busy, please retry shortly"}), 503, {"Retry-After": str(RETRY_AFTER_SECONDS)}
+
 @auth_bp.route('/google')
 def google_login():
     try:
@@ -61,7 +65,7 @@ def google_callback():
                 """
             else:
                 # Create new user and redirect to home
-                password_hash = generate_password_hash('google-oauth-user')
+                password_hash = hash_password('google-oauth-user')
                 create_user(
                     email=email,
                     password_hash=password_hash,
@@ -160,10 +164,17 @@ def login():
             logging.error(f"User not found for email: {data['email']}")
             return create_response("Invalid credentials", 401)
 
-        if not check_password_hash(user['password_hash'], data['password']):
+        if not verify_password(user['password_hash'], data['password']):
             logging.error(f"Password mismatch for email: {data['email']}")
             return create_response("Invalid credentials", 401)
 
+        if needs_rehash(user['password_hash']):
+            try:
+                update_password_hash(user['id'], hash_password(data['password']))
+            except Exception as e:
+                # The login itself succeeded; the upgrade is retried next time
+                logging.warning(f"Password rehash failed for {data['email']}: {e}")
+
         access_token = create_access_token(identity=user['email'])
         return jsonify({
             "success": True,
@@ -174,6 +185,8 @@ def login():
             },
             "redirect": url_for('home.home_page')
         })
+    except HashingBusyError:
+        return busy_response()
     except Exception as e:
         logging.error(f"Login error: {str(e)} - Request data: {data}")
         return create_response("Login failed", 500)
@@ -198,11 +211,13 @@ def register():
         start_time = time.time()
         create_user(
             email=data['email'],
-            password_hash=generate_password_hash(data['password']),
+            password_hash=hash_password(data['password']),
             full_name=data['name'],
             phone=data.get('phone')
         )
         print(f"User creation time: {time.time() - start_time:.2f}s")
         return jsonify({"message": "User created successfully"}), 201
+    except HashingBusyError:
+        return busy_response()
     except Exception as e:
         return jsonify({"error": str(e)}), 500 
\ No newline at end of file
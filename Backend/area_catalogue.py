@@ -0,0 +1,165 @@
+import os
+import re
+import json
+import threading
+import logging
+from bisect import bisect_left, insort
+from collections import Counter
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+AREA_MAP_PATH = os.getenv("AREA_MAP_PATH", os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "Energy_optimizer", "area_map.json"))
+# Local results scoring at least this well are returned without asking upstream
+AREA_SEARCH_MIN_SCORE = float(os.getenv("AREA_SEARCH_MIN_SCORE", "0.5"))
+# Trigram similarity below this is not considered a fuzzy match
+AREA_FUZZY_THRESHOLD = float(os.getenv("AREA_FUZZY_THRESHOLD", "0.3"))
+
+_non_word = re.compile(r"[^a-z0-9]+")
+
+
+def normalize(text):
+    return _non_word.sub(" ", (text or "").lower()).strip()
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class AreaCatalogue:
+    """In-memory, searchable catalogue of load-shedding areas.
+
+    Areas are {"id", "name", "region"} dicts, the shape EskomSePush's
+    areas_search returns. Searches first use a sorted token list for
+    prefix matches (every query word must prefix a word of the name) and
+    fall back to trigram similarity for misspellings.
+    """
+
+    def __init__(self):
+        self._areas = []
+        self._by_id = {}
+        self._tokens = []  # sorted (token, area index)
+        self._trigrams = {}  # trigram -> set of area indexes
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._areas)
+
+    def add(self, areas):
+        """Add or update areas; returns how many were new"""
+        added = 0
+        with self._lock:
+            for area in areas:
+                if not area.get("id") or not area.get("name"):
+                    continue
+                existing = self._by_id.get(area["id"])
+                if existing is not None:
+                    if area.get("region"):
+                        self._areas[existing]["region"] = area["region"]
+                    continue
+                index = len(self._areas)
+                record = {"id": area["id"], "name": area["name"], "region": area.get("region")}
+                self._areas.append(record)
+                self._by_id[record["id"]] = index
+                name = normalize(record["name"])
+                record["_key"] = name
+                for token in set(name.split()):
+                    insort(self._tokens, (token, index))
+                for gram in trigrams(name):
+                    self._trigrams.setdefault(gram, set()).add(index)
+                added += 1
+        return added
+
+    def get(self, area_id):
+        with self._lock:
+            index = self._by_id.get(area_id)
+            return self._public(self._areas[index]) if index is not None else None
+
+    def _prefixed(self, prefix):
+        start = bisect_left(self._tokens, (prefix,))
+        matches = set()
+        for token, index in self._tokens[start:]:
+            if not token.startswith(prefix):
+                break
+            matches.add(index)
+        return matches
+
+    @staticmethod
+    def _public(record):
+        return {k: v for k, v in record.items() if not k.startswith("_")}
+
+    def search(self, text, limit=10):
+        """Best matches for `text` as (score, area) pairs, highest score first.
+
+        Exact names score 1.0, name prefixes 0.9, word-prefix matches 0.8;
+        fuzzy matches score their trigram similarity (at most 0.8).
+        """
+        query = normalize(text)
+        if not query:
+            return []
+        scores = {}
+        with self._lock:
+            words = query.split()
+            candidates = self._prefixed(words[0])
+            for word in words[1:]:
+                candidates &= self._prefixed(word)
+            for index in candidates:
+                key = self._areas[index]["_key"]
+                scores[index] = 1.0 if key == query else 0.9 if key.startswith(query) else 0.8
+
+            if len(scores) < limit:
+                query_grams = trigrams(query)
+                shared = Counter()
+                for gram in query_grams:
+                    shared.update(self._trigrams.get(gram, ()))
+                for index, count in shared.items():
+                    if index in scores:
+                        continue
+                    key_grams = len(trigrams(self._areas[index]["_key"]))
+                    similarity = count / (len(query_grams) + key_grams - count)
+                    if similarity >= AREA_FUZZY_THRESHOLD:
+                        scores[index] = min(similarity, 0.8)
+
+            ranked = sorted(scores.items(),
+                            key=lambda item: (-item[1], len(self._areas[item[0]]["name"]), self._areas[item[0]]["name"]))
+            return [(round(score, 3), self._public(self._areas[index])) for index, score in ranked[:limit]]
+
+
+def load_area_map(path=AREA_MAP_PATH):
+    """Flatten area_map.json (province -> municipality -> suburb: id) into areas"""
+    with open(path, "r") as f:
+        area_map = json.load(f)
+    return [
+        {"id": area_id, "name": suburb, "region": f"{municipality}, {province}"}
+        for province, municipalities in area_map.items()
+        for municipality, suburbs in municipalities.items()
+        for suburb, area_id in suburbs.items()
+    ]
+
+
+catalogue = AreaCatalogue()
+try:
+    catalogue.add(load_area_map())
+except (OSError, ValueError) as e:
+    logger.warning(f"Could not seed area catalogue from {AREA_MAP_PATH}: {e}")
+
+
+def search_areas(text, limit=10, fetch_upstream=None):
+    """Search the catalogue, asking upstream only when nothing local matches well.
+
+    `fetch_upstream(text)` should return EskomSePush-style area dicts; they
+    are added to the catalogue so later searches for them stay local.
+    """
+    results = catalogue.search(text, limit)
+    if fetch_upstream is not None and (not results or results[0][0] < AREA_SEARCH_MIN_SCORE):
+        try:
+            if catalogue.add(fetch_upstream(text)):
+                results = catalogue.search(text, limit)
+        except Exception as e:
+            logger.warning(f"Upstream area search for {text!r} failed: {e}")
+    return [area for _, area in results]
@@ -0,0 +1,171 @@
+import asyncio
+import os
+
+import asyncpg
+from dotenv import load_dotenv
+
+import user_cache
+from db_pool import db_settings
+
+# Load environment variables
+load_dotenv()
+
+# Async pool sizing is independent of the threaded pool in db_pool.py
+ASYNC_POOL_MIN_SIZE = int(os.getenv('DB_ASYNC_POOL_MIN_SIZE', '1'))
+ASYNC_POOL_MAX_SIZE = int(os.getenv('DB_ASYNC_POOL_MAX_SIZE', '20'))
+ASYNC_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+
+USER_COLUMNS = ['id', 'email', 'password_hash', 'full_name', 'phone']
+
+_pool = None
+_pool_lock = asyncio.Lock()
+
+
+# ================== DATABASE CONNECTION ==================
+async def get_async_pool():
+    """Return the asyncpg pool for the running event loop, creating it on first use"""
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                settings = db_settings()
+                _pool = await asyncpg.create_pool(
+                    host=settings['host'],
+                    database=settings['database'],
+                    user=settings['user'],
+                    password=settings['password'],
+                    port=int(settings['port']),
+                    min_size=ASYNC_POOL_MIN_SIZE,
+                    max_size=ASYNC_POOL_MAX_SIZE,
+                    timeout=ASYNC_POOL_TIMEOUT,
+                )
+    return _pool
+
+
+async def close_async_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+
+# ================== USER OPERATIONS ==================
+async def create_user(email, password_hash, full_name=None, phone=None):
+    """Create a new user account, returning (id, email, full_name)"""
+    pool = await get_async_pool()
+    return await pool.fetchrow(
+        """INSERT INTO users (email, password_hash, full_name, phone)
+        VALUES ($1, $2, $3, $4) RETURNING id, email, full_name""",
+        email, password_hash, full_name, phone
+    )
+
+
+async def get_user_by_email(email):
+    """Get user by email address, ignoring case"""
+    pool = await get_async_pool()
+    row = await pool.fetchrow(
+        "SELECT id, email, password_hash, full_name, phone FROM users WHERE lower(email) = $1 ORDER BY id LIMIT 1",
+        user_cache.normalize_email(email)
+    )
+    return dict(zip(USER_COLUMNS, row)) if row else None
+
+
+async def get_user_by_id(user_id):
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+    pool = await get_async_pool()
+    row = await pool.fetchrow(
+        "SELECT id, email, full_name, phone FROM users WHERE id = $1", user_id
+    )
+    return dict(row) if row else None
+
+
+async def update_password_hash(user_id, password_hash):
+    """Replace a user's stored password hash (e.g. after a cost upgrade)"""
+    pool = await get_async_pool()
+    await pool.execute(
+        "UPDATE users SET password_hash = $1 WHERE id = $2", password_hash, user_id
+    )
+    user_cache.invalidate(user_id=user_id)
+
+
+# ================== SOLAR SYSTEM OPERATIONS ==================
+async def add_solar_system(installer_id, capacity_kw, components=None, installation_date=None, area_id=None):
+    """Add a new solar system installation"""
+    pool = await get_async_pool()
+    return await pool.fetchval(
+        """INSERT INTO solar_systems (installer_id, capacity_kw, components, installation_date, area_id)
+        VALUES ($1, $2, $3, $4, $5) RETURNING id""",
+        installer_id, capacity_kw, components, installation_date, area_id
+    )
+
+
+# ================== CONTRACT OPERATIONS ==================
+async def create_contract(user_id, system_id, monthly_payment, total_cost, start_date, end_date=None):
+    """Create a new solar contract"""
+    pool = await get_async_pool()
+    return await pool.fetchval(
+        """INSERT INTO solar_contracts
+        (user_id, system_id, monthly_payment, total_cost, start_date, end_date)
+        VALUES ($1, $2, $3, $4, $5, $6) RETURNING id""",
+        user_id, system_id, monthly_payment, total_cost, start_date, end_date
+    )
+
+
+async def get_user_contracts(user_id):
+    """Get all contracts for a user"""
+    pool = await get_async_pool()
+    return await pool.fetch(
+        """SELECT sc.*, ss.capacity_kw, ss.components
+        FROM solar_contracts sc
+        JOIN solar_systems ss ON sc.system_id = ss.id
+        WHERE sc.user_id = $1""",
+        user_id
+    )
+
+
+# ================== PAYMENT OPERATIONS ==================
+async def record_payment(contract_id, amount, payment_method):
+    """Record a payment and update contract balance"""
+    pool = await get_async_pool()
+    try:
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    """INSERT INTO payments (contract_id, amount, payment_method)
+                    VALUES ($1, $2, $3)""",
+                    contract_id, amount, payment_method
+                )
+                await conn.execute(
+                    """UPDATE solar_contracts
+                    SET payments_made = payments_made + $1
+                    WHERE id = $2""",
+                    amount, contract_id
+                )
+                await conn.execute(
+                    """INSERT INTO contract_balance_summaries (contract_id, payment_count, last_payment_at)
+                    VALUES ($1, 1, CURRENT_TIMESTAMP)
+                    ON CONFLICT (contract_id) DO UPDATE SET
+                        payment_count = contract_balance_summaries.payment_count + 1,
+                        last_payment_at = GREATEST(contract_balance_summaries.last_payment_at, EXCLUDED.last_payment_at),
+                        updated_at = CURRENT_TIMESTAMP""",
+                    contract_id
+                )
+        return True
+    except Exception as e:
+        print(f"🚨 Payment failed: {e}")
+        return False
+
+
+async def get_payment_history(contract_id):
+    """Get payment history for a contract"""
+    pool = await get_async_pool()
+    return await pool.fetch(
+        """SELECT id, amount, payment_date, payment_method
+        FROM payments
+        WHERE contract_id = $1
+        ORDER BY payment_date DESC""",
+        contract_id
+    )
@@ -0,0 +1,84 @@
+"""Accuracy, latency and confidence threshold of the intent classifier backends.
+
+Evaluates EnhancedChatbot's labels on the held-out HELD_OUT_QUERIES (not
+derived from the keyword tables) and reports the low-confidence threshold
+that best separates right answers from wrong and off-topic ones. Compares
+the tfidf backend with the zero-shot pipeline (skipped if transformers is
+not installed or CHATBOT_ENABLE_MODEL=false).
+Run: python bench_intent_classifier.py
+"""
+import argparse
+import statistics
+import time
+
+from chat_interface import EnhancedChatbot
+from hugging_services import get_classifier
+from intent_classifier import BACKENDS
+from intent_eval_set import HELD_OUT_QUERIES
+
+
+def calibrate(outcomes):
+    """Threshold maximizing queries handled right, and that share.
+
+    `outcomes` are (top score, answered correctly) pairs; off-topic queries
+    are never correct. A query is handled right when correct answers score
+    at or above the threshold and everything else below it. Returns the
+    midpoint between the scores either side of the best cut.
+    """
+    scores = sorted({score for score, _ in outcomes})
+    cuts = [0.0] + [(a + b) / 2 for a, b in zip(scores, scores[1:])] + [1.0]
+    handled = lambda t: sum((score >= t) == correct for score, correct in outcomes)
+    best = max(cuts, key=handled)
+    return best, handled(best) / len(outcomes)
+
+
+def bench(classifier, labels, repeat):
+    # Warm-up call, so one-off model loading is not counted as latency
+    classifier.classify("warm up", labels)
+    latencies, outcomes = [], []
+    for query, expected in HELD_OUT_QUERIES:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            result = classifier.classify(query, labels)
+            latencies.append((time.perf_counter() - started) * 1000)
+        outcomes.append((result["scores"][0], result["labels"][0] == expected))
+    latencies.sort()
+    on_topic = [correct for (_, correct), (_, expected) in zip(outcomes, HELD_OUT_QUERIES) if expected]
+    threshold, handled = calibrate(outcomes)
+    return {
+        "accuracy": sum(on_topic) / len(on_topic),
+        "threshold": threshold,
+        "handled": handled,
+        "mean_ms": statistics.mean(latencies),
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="Calls per query")
+    parser.add_argument("--backends", default=",".join(BACKENDS))
+    args = parser.parse_args()
+
+    table, labels = EnhancedChatbot.label_keywords, EnhancedChatbot.candidate_labels
+    off_topic = sum(expected is None for _, expected in HELD_OUT_QUERIES)
+    print(f"{len(HELD_OUT_QUERIES)} held-out queries ({off_topic} off-topic), {len(labels)} labels\n")
+    print(f"{'backend':>10} {'accuracy':>9} {'threshold':>10} {'handled':>8} {'mean ms':>9} {'p95 ms':>9}")
+    for backend in args.backends.split(","):
+        try:
+            started = time.perf_counter()
+            classifier = get_classifier(table, backend)
+            build_ms = (time.perf_counter() - started) * 1000
+            # zero-shot results are cached after the first call; only the
+            # first call per query measures the model itself
+            result = bench(classifier, labels, 1 if backend == "zero-shot" else args.repeat)
+        except Exception as e:
+            print(f"{backend:>10} skipped: {e}")
+            continue
+        print(f"{backend:>10} {result['accuracy']:>9.0%} {result['threshold']:>10.2f} {result['handled']:>8.0%}"
+              f" {result['mean_ms']:>9.2f} {result['p95_ms']:>9.2f}   (built in {build_ms:.0f} ms,"
+              f" current low_confidence {classifier.low_confidence})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Per-query cost of keyword intent matching as the intent catalogue grows.
+
+Compares the original loop (every intent, every keyword, substring `in`)
+with the compiled IntentMatcher. Run: python bench_intent_matcher.py
+"""
+import argparse
+import random
+import string
+import timeit
+
+from intent_matcher import IntentMatcher
+
+QUERIES = [
+    "How do I pay my bill?",
+    "Is my solar panel working properly?",
+    "I need technical support",
+    "What's my energy consumption today?",
+    "How do I schedule maintenance?",
+    "my inverter shows an error code and is not working since yesterday evening",
+]
+
+
+def make_catalogue(size, keywords_per_intent=5, seed=1):
+    rng = random.Random(seed)
+    word = lambda: "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+    return {
+        f"intent_{i}": [" ".join(word() for _ in range(rng.randint(1, 2))) for _ in range(keywords_per_intent)]
+        for i in range(size)
+    }
+
+
+def naive_match(catalogue, query):
+    query_lower = query.lower()
+    for intent, keywords in catalogue.items():
+        if any(keyword in query_lower for keyword in keywords):
+            return intent
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="6,50,200,500,1000", help="Comma-separated catalogue sizes")
+    parser.add_argument("--number", type=int, default=2000, help="Repetitions per query")
+    args = parser.parse_args()
+
+    print(f"{'intents':>8} {'naive us/query':>15} {'matcher us/query':>17} {'build ms':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        catalogue = make_catalogue(size)
+        started = timeit.default_timer()
+        matcher = IntentMatcher(catalogue)
+        build_ms = (timeit.default_timer() - started) * 1000
+
+        for query in QUERIES:
+            assert matcher.match(query) == naive_match(catalogue, query), query
+
+        def per_query(fn):
+            total = sum(timeit.timeit(lambda: fn(q), number=args.number) for q in QUERIES)
+            return total / (args.number * len(QUERIES)) * 1e6
+
+        naive = per_query(lambda q: naive_match(catalogue, q))
+        compiled = per_query(matcher.match)
+        print(f"{size:>8} {naive:>15.2f} {compiled:>17.2f} {build_ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
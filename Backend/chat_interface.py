@@ -1,21 +1,36 @@
-from hugging_services import HuggingFaceChatbot
-import re
+from hugging_services import HuggingFaceChatbot, ModelDisabledError, get_classifier
+from intent_matcher import IntentMatcher
 from datetime import datetime
 
 class EnhancedChatbot(HuggingFaceChatbot):
+    # Intents handled by generate_dynamic_response
+    candidate_labels = ["payment", "technical_support", "energy_consumption",
+                        "maintenance", "solar_panel", "status"]
+    # Training keywords for candidate_labels when using the tfidf classifier
+    label_keywords = {
+        "payment": ["payment", "pay", "bill", "late payment", "due date", "invoice"],
+        "technical_support": ["technical support", "error", "not working", "broken", "fault", "issue"],
+        "energy_consumption": ["energy consumption", "usage", "consumption", "save energy", "electricity use", "kwh"],
+        "maintenance": ["maintenance", "schedule maintenance", "clean", "cleaning", "service", "repair"],
+        "solar_panel": ["solar panel", "panel", "efficiency", "install", "installation", "inverter"],
+        "status": ["status", "system status", "working properly", "performance", "generation", "health"]
+    }
+
     def __init__(self):
         super().__init__()
+        self.label_classifier = get_classifier(self.label_keywords)
         # Add more dynamic context
         self.context = {
             "time_of_day": self._get_time_of_day(),
             "common_patterns": {
-                "greeting": r'\b(hi|hello|hey|greetings)\b',
-                "farewell": r'\b(bye|goodbye|see you|farewell)\b',
-                "thanks": r'\b(thanks|thank you|appreciate)\b',
-                "help": r'\b(help|assist|support)\b',
-                "problem": r'\b(issue|problem|error|wrong)\b'
+                "greeting": ["hi", "hello", "hey", "greetings"],
+                "farewell": ["bye", "goodbye", "see you", "farewell"],
+                "thanks": ["thanks", "thank you", "appreciate"],
+                "help": ["help", "assist", "support"],
+                "problem": ["issue", "problem", "error", "wrong"]
             }
         }
+        self.pattern_matcher = IntentMatcher(self.context["common_patterns"], whole_words=True)
 
     def _get_time_of_day(self):
         hour = datetime.now().hour
@@ -32,14 +47,13 @@ class EnhancedChatbot(HuggingFaceChatbot):
         """Generate more dynamic and contextual responses"""
         
         # Check for basic patterns first
-        for pattern_type, pattern in self.context["common_patterns"].items():
-            if re.search(pattern, query.lower()):
-                if pattern_type == "greeting":
-                    return f"Good {self.context['time_of_day']}! How can I assist you with your solar energy system today?"
-                elif pattern_type == "farewell":
-                    return "Thank you for chatting! If you need any more help with your solar system, don't hesitate to ask."
-                elif pattern_type == "thanks":
-                    return "You're welcome! Is there anything else you'd like to know about your solar energy system?"
+        for pattern_type in self.pattern_matcher.matched_intents(query):
+            if pattern_type == "greeting":
+                return f"Good {self.context['time_of_day']}! How can I assist you with your solar energy system today?"
+            elif pattern_type == "farewell":
+                return "Thank you for chatting! If you need any more help with your solar system, don't hesitate to ask."
+            elif pattern_type == "thanks":
+                return "You're welcome! Is there anything else you'd like to know about your solar energy system?"
 
         # Generate contextual responses based on intent and query content
         responses = {
@@ -54,8 +68,8 @@ class EnhancedChatbot(HuggingFaceChatbot):
         # Get the specific response or fall back to a general one
         response = responses.get(intent, self._handle_general_query(query))
         
-        # Add confidence-based qualifier if confidence is low
-        if confidence < 0.7:
+        # Add confidence-based qualifier if confidence is low for this backend
+        if confidence < self.label_classifier.low_confidence:
             response += "\n\nIf this doesn't address your question completely, please feel free to ask for more specific details."
             
         return response
@@ -113,13 +127,16 @@ class EnhancedChatbot(HuggingFaceChatbot):
     def chat(self, query: str) -> str:
         try:
             # Get classification and confidence
-            result = self.pipe(query, candidate_labels=self.candidate_labels)
+            result = self.label_classifier.classify(query, self.candidate_labels)
             intent = result['labels'][0]
             confidence = result['scores'][0]
             
             # Generate dynamic response
             return self.generate_dynamic_response(query, intent, confidence)
-            
+
+        except ModelDisabledError:
+            # Without the model only the pattern and general responses apply
+            return self.generate_dynamic_response(query, None, 0.0)
         except Exception as e:
             print(f"Error in chat: {e}")
             return "I apologize, but I'm having trouble processing your request. Could you please rephrase your question?"
@@ -0,0 +1,83 @@
+import os
+import json
+import atexit
+import logging
+
+from dotenv import load_dotenv
+
+from ttl_cache import TTLCache
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+CHATBOT_CACHE_MAX_SIZE = int(os.getenv('CHATBOT_CACHE_MAX_SIZE', '5000'))
+CHATBOT_CACHE_TTL = float(os.getenv('CHATBOT_CACHE_TTL', '604800'))
+# JSON file the cache is loaded from at start-up and written to at exit;
+# unset to keep it in memory only
+CHATBOT_CACHE_PATH = os.getenv('CHATBOT_CACHE_PATH')
+
+# Zero-shot results keyed by (normalized query, candidate labels)
+_results = TTLCache(CHATBOT_CACHE_MAX_SIZE, CHATBOT_CACHE_TTL)
+
+
+def normalize_query(query):
+    """Lower-case, collapse whitespace and drop trailing punctuation"""
+    return " ".join(query.lower().split()).rstrip("?!. ")
+
+
+def _key(query, labels):
+    return normalize_query(query), tuple(labels)
+
+
+def get(query, labels):
+    """Cached classification result, or None"""
+    return _results.get(_key(query, labels))
+
+
+def remember(query, labels, result):
+    _results.set(_key(query, labels), result)
+
+
+def stats():
+    return _results.stats()
+
+
+def load(path, model):
+    """Load results saved by save(); entries from a different model are ignored"""
+    try:
+        with open(path, 'r') as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return 0
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not load classification cache from {path}: {e}")
+        return 0
+    if saved.get('model') != model:
+        return 0
+    for query, labels, result in saved.get('entries', []):
+        _results.set((query, tuple(labels)), result)
+    return len(saved.get('entries', []))
+
+
+def save(path, model):
+    """Write the cache to `path` atomically"""
+    entries = [[query, list(labels), result] for (query, labels), result in _results.items()]
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump({'model': model, 'entries': entries}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not save classification cache to {path}: {e}")
+
+
+def enable_persistence(model, path=CHATBOT_CACHE_PATH):
+    """Load `path` now and save back to it when the process exits"""
+    if not path:
+        return
+    loaded = load(path, model)
+    if loaded:
+        logger.info(f"Loaded {loaded} cached classifications from {path}")
+    atexit.register(save, path, model)
@@ -0,0 +1,231 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import pool as pg_pool
+from psycopg2 import extensions
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# ================== POOL CONFIGURATION ==================
+POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+# Seconds a caller waits for a free connection before giving up
+POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+# Connections idle for longer than this are pinged before being handed out
+HEALTHCHECK_INTERVAL = float(os.getenv('DB_POOL_HEALTHCHECK_INTERVAL', '30'))
+
+
+def db_settings():
+    """Connection settings shared by every pooled connection"""
+    return {
+        'host': os.getenv('DB_HOST', 'localhost'),
+        'database': os.getenv('DB_NAME', 'Fintech_Solar'),
+        'user': os.getenv('DB_USER', 'postgres'),
+        'password': os.getenv('DB_PASSWORD', ''),
+        'port': os.getenv('DB_PORT', '5432'),
+    }
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection becomes free within the pool timeout"""
+
+
+class ConnectionPool:
+    """Thread-safe PostgreSQL pool with health checks and checkout metrics.
+
+    Wraps psycopg2's ThreadedConnectionPool, which raises as soon as it is
+    exhausted, with a semaphore so callers queue for a free connection
+    instead. The underlying pool is opened lazily on first checkout.
+    """
+
+    def __init__(self, minconn=POOL_MIN_SIZE, maxconn=POOL_MAX_SIZE, timeout=POOL_TIMEOUT,
+                 healthcheck_interval=HEALTHCHECK_INTERVAL, **conn_kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.healthcheck_interval = healthcheck_interval
+        self.conn_kwargs = conn_kwargs or db_settings()
+
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._last_used = {}
+
+        # Metrics
+        self._in_use = 0
+        self._waiting = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._checkout_time_total = 0.0
+        self._checkout_time_max = 0.0
+
+    def _get_pool(self):
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = pg_pool.ThreadedConnectionPool(
+                        self.minconn, self.maxconn, **self.conn_kwargs
+                    )
+        return self._pool
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        last_used = self._last_used.get(id(conn))
+        if last_used is not None and time.monotonic() - last_used < self.healthcheck_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _checkout_healthy(self):
+        pool = self._get_pool()
+        # Every broken connection is discarded, so at most maxconn retries are needed
+        for _ in range(self.maxconn + 1):
+            conn = pool.getconn()
+            if self._is_healthy(conn):
+                return conn
+            self._last_used.pop(id(conn), None)
+            pool.putconn(conn, close=True)
+            with self._lock:
+                self._discarded += 1
+        raise psycopg2.OperationalError("No healthy database connection available")
+
+    def getconn(self):
+        """Check out a healthy connection, waiting up to `timeout` seconds"""
+        start = time.perf_counter()
+        with self._lock:
+            self._waiting += 1
+        acquired = self._slots.acquire(timeout=self.timeout)
+        with self._lock:
+            self._waiting -= 1
+            if not acquired:
+                self._timeouts += 1
+        if not acquired:
+            raise PoolTimeoutError(
+                f"Timed out after {self.timeout}s waiting for a database connection"
+            )
+
+        try:
+            conn = self._checkout_healthy()
+        except Exception:
+            self._slots.release()
+            raise
+
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._checkout_time_total += elapsed
+            self._checkout_time_max = max(self._checkout_time_max, elapsed)
+        return conn
+
+    def putconn(self, conn, close=False):
+        """Return a connection, rolling back any transaction left open"""
+        try:
+            if not close and not conn.closed:
+                if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+        except psycopg2.Error:
+            close = True
+
+        close = close or bool(conn.closed)
+        if close:
+            self._last_used.pop(id(conn), None)
+        else:
+            self._last_used[id(conn)] = time.monotonic()
+        try:
+            self._get_pool().putconn(conn, close=close)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                if close:
+                    self._discarded += 1
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a pooled connection.
+
+        Uncommitted work is rolled back when the block exits, so callers
+        must commit explicitly, exactly as with a plain psycopg2 connection.
+        """
+        conn = self.getconn()
+        try:
+            yield conn
+        except Exception:
+            if not conn.closed:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    pass
+            raise
+        finally:
+            self.putconn(conn)
+
+    def stats(self):
+        """Snapshot of pool usage for health endpoints and logging"""
+        with self._lock:
+            checkouts = self._checkouts
+            return {
+                'min_size': self.minconn,
+                'max_size': self.maxconn,
+                'in_use': self._in_use,
+                'waiting': self._waiting,
+                'checkouts': checkouts,
+                'timeouts': self._timeouts,
+                'discarded': self._discarded,
+                'checkout_latency_avg_ms': (self._checkout_time_total / checkouts * 1000) if checkouts else 0.0,
+                'checkout_latency_max_ms': self._checkout_time_max * 1000,
+            }
+
+    def closeall(self):
+        with self._lock:
+            if self._pool is not None and not self._pool.closed:
+                self._pool.closeall()
+            self._pool = None
+            self._last_used.clear()
+
+
+# ================== PROCESS-WIDE POOL ==================
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide pool, creating a fresh one after fork"""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                # Connections inherited from a parent process must not be reused
+                _pool = ConnectionPool()
+                _pool_pid = os.getpid()
+    return _pool
+
+
+@contextmanager
+def pooled_connection():
+    """Shortcut for `get_pool().connection()`"""
+    with get_pool().connection() as conn:
+        yield conn
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+def close_pool():
+    if _pool is not None:
+        _pool.closeall()
@@ -3,7 +3,7 @@ from support import connect_db
 def drop_tables():
     conn, cur = connect_db()
     try:
-        cur.execute("DROP TABLE IF EXISTS payments, solar_contracts, solar_systems, users CASCADE")
+        cur.execute("DROP TABLE IF EXISTS contract_balance_summaries, payments, solar_contracts, solar_systems, users, schema_migrations CASCADE")
         conn.commit()
         print("✅ Tables dropped successfully")
     except Exception as e:
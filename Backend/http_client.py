@@ -0,0 +1,244 @@
+import os
+import time
+import random
+import threading
+import logging
+from bisect import bisect_left
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) seconds applied when a caller passes no timeout
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+# Retries after the first attempt; only idempotent methods are retried by default
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+HTTP_BACKOFF_BASE = float(os.getenv("HTTP_BACKOFF_BASE", "0.2"))
+HTTP_BACKOFF_MAX = float(os.getenv("HTTP_BACKOFF_MAX", "5"))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "16"))
+# Consecutive failures that open a host's circuit, and how long it stays open
+HTTP_BREAKER_THRESHOLD = int(os.getenv("HTTP_BREAKER_THRESHOLD", "5"))
+HTTP_BREAKER_RESET = float(os.getenv("HTTP_BREAKER_RESET", "30"))
+
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Upper bounds (ms) of the latency histogram buckets; the last one is open-ended
+LATENCY_BUCKETS_MS = (25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised without calling a host whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures and fails fast for
+    `reset_timeout` seconds; then lets one trial request through (half-open)
+    and closes again if it succeeds.
+    """
+
+    def __init__(self, threshold=HTTP_BREAKER_THRESHOLD, reset_timeout=HTTP_BREAKER_RESET):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self.rejected = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of request latencies"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        ms = seconds * 1000.0
+        with self._lock:
+            self.counts[bisect_left(self.buckets, ms)] += 1
+            self.total_ms += ms
+
+    def _quantile(self, q, count):
+        rank = q * count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def snapshot(self):
+        with self._lock:
+            count = sum(self.counts)
+            return {
+                "count": count,
+                "avg_ms": round(self.total_ms / count, 1) if count else 0.0,
+                "p50_ms": self._quantile(0.5, count) if count else None,
+                "p95_ms": self._quantile(0.95, count) if count else None,
+                "p99_ms": self._quantile(0.99, count) if count else None,
+                "buckets": {("+Inf" if b == float("inf") else str(b)): n
+                            for b, n in zip(self.buckets, self.counts)},
+            }
+
+
+class _Host:
+    def __init__(self):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_MAXSIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+
+
+class HttpClient:
+    """Shared outbound HTTP client: one pooled session per host, default
+    timeouts, retries with jittered exponential backoff, a circuit breaker
+    per host and per-host latency histograms.
+    """
+
+    def __init__(self):
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host(self, url):
+        netloc = urlsplit(url).netloc
+        host = self._hosts.get(netloc)
+        if host is None:
+            with self._lock:
+                host = self._hosts.setdefault(netloc, _Host())
+        return netloc, host
+
+    @staticmethod
+    def _backoff(attempt, retry_after=None):
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), HTTP_BACKOFF_MAX)
+            except ValueError:
+                pass
+        # "Full jitter": spread retries from many workers over the whole window
+        return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * 2 ** attempt))
+
+    def request(self, method, url, timeout=None, retries=None, **kwargs):
+        """Like requests.request, through the host's pooled session.
+
+        Connection errors, timeouts and 429/502/503/504 responses are
+        retried `retries` times (default HTTP_MAX_RETRIES for idempotent
+        methods, 0 otherwise). Raises CircuitOpenError while the host's
+        breaker is open. Other HTTP error statuses are returned as-is.
+        """
+        method = method.upper()
+        if timeout is None:
+            timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        if retries is None:
+            retries = HTTP_MAX_RETRIES if method in IDEMPOTENT_METHODS else 0
+        netloc, host = self._host(url)
+
+        attempt = 0
+        while True:
+            if not host.breaker.allow():
+                raise CircuitOpenError(f"Circuit open for {netloc}; not calling {url}")
+            host.requests += 1
+            started = time.monotonic()
+            try:
+                response = host.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                host.latency.observe(time.monotonic() - started)
+                host.breaker.record_failure()
+                host.errors += 1
+                if attempt >= retries:
+                    raise
+                logger.warning(f"{method} {netloc} failed ({e}); retrying")
+                delay = self._backoff(attempt)
+            except BaseException:
+                # Any other failure must still release a half-open trial
+                host.latency.observe(time.monotonic() - started)
+                host.breaker.record_failure()
+                host.errors += 1
+                raise
+            else:
+                host.latency.observe(time.monotonic() - started)
+                if response.status_code >= 500:
+                    host.breaker.record_failure()
+                else:
+                    host.breaker.record_success()
+                if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                    return response
+                logger.warning(f"{method} {netloc} returned {response.status_code}; retrying")
+                delay = self._backoff(attempt, response.headers.get("Retry-After"))
+                response.close()
+            attempt += 1
+            host.retries += 1
+            time.sleep(delay)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {
+            netloc: {
+                "requests": host.requests,
+                "retries": host.retries,
+                "errors": host.errors,
+                "circuit": host.breaker.state,
+                "circuit_rejected": host.breaker.rejected,
+                "latency": host.latency.snapshot(),
+            }
+            for netloc, host in hosts.items()
+        }
+
+
+client = HttpClient()
+request = client.request
+get = client.get
+post = client.post
+stats = client.stats
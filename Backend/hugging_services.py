@@ -1,19 +1,113 @@
 import os
-import requests
+import threading
+import http_client
+import classification_cache
 from dotenv import load_dotenv
-from transformers import pipeline
+from intent_classifier import make_classifier
+from intent_matcher import IntentMatcher
+from micro_batcher import MicroBatcher
 
 load_dotenv()
 
+CHATBOT_MODEL = os.getenv("CHATBOT_MODEL", "facebook/bart-large-mnli")
+# Intent classifier backend: "tfidf" (fast, trained from the keyword tables)
+# or "zero-shot" (CHATBOT_MODEL through the batched pipeline below)
+CHATBOT_CLASSIFIER = os.getenv("CHATBOT_CLASSIFIER", "tfidf")
+# Set to false to run keyword matching only, without ever loading the model
+CHATBOT_ENABLE_MODEL = os.getenv("CHATBOT_ENABLE_MODEL", "true").lower() == "true"
+# Load the model at import time, e.g. in a gunicorn --preload master, so forked
+# workers share its memory copy-on-write instead of each loading their own
+CHATBOT_PRELOAD_MODEL = os.getenv("CHATBOT_PRELOAD_MODEL", "false").lower() == "true"
+# Concurrent classifications are run as one pipeline call of up to MAX_SIZE
+# queries, waiting at most MAX_WAIT_MS for a batch to fill
+CHATBOT_BATCH_MAX_SIZE = int(os.getenv("CHATBOT_BATCH_MAX_SIZE", "16"))
+CHATBOT_BATCH_MAX_WAIT_MS = float(os.getenv("CHATBOT_BATCH_MAX_WAIT_MS", "10"))
+CHATBOT_CLASSIFY_TIMEOUT = float(os.getenv("CHATBOT_CLASSIFY_TIMEOUT", "60"))
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+_batcher = None
+
+
+class ModelDisabledError(RuntimeError):
+    """Raised when the zero-shot model is needed but CHATBOT_ENABLE_MODEL is false"""
+
+
+def get_zero_shot_pipeline():
+    """The process-wide zero-shot pipeline, loaded on first use"""
+    global _pipeline
+    if not CHATBOT_ENABLE_MODEL:
+        raise ModelDisabledError("Zero-shot model disabled by CHATBOT_ENABLE_MODEL")
+    if _pipeline is None:
+        with _pipeline_lock:
+            if _pipeline is None:
+                # transformers (and torch) are imported here so that processes
+                # which never classify don't pay for them either
+                from transformers import pipeline
+                _pipeline = pipeline(
+                    "zero-shot-classification",
+                    model=CHATBOT_MODEL,
+                    token=os.getenv("HUGGINGFACE_TOKEN")
+                )
+    return _pipeline
+
+
+def _classify_batch(items):
+    """Run (query, labels) items through the pipeline, one call per label set"""
+    pipe = get_zero_shot_pipeline()
+    results = [None] * len(items)
+    groups = {}
+    for i, (query, labels) in enumerate(items):
+        groups.setdefault(labels, []).append(i)
+    for labels, indexes in groups.items():
+        outputs = pipe([items[i][0] for i in indexes], candidate_labels=list(labels),
+                       batch_size=len(indexes))
+        if isinstance(outputs, dict):
+            outputs = [outputs]
+        for i, output in zip(indexes, outputs):
+            results[i] = output
+    return results
+
+
+def classify(query, labels):
+    """Zero-shot classify `query`, batched with concurrent callers.
+
+    Returns the pipeline's {"labels", "scores"} result for this query.
+    Repeated queries (after normalization) are answered from
+    classification_cache without running the model.
+    """
+    global _batcher
+    if not CHATBOT_ENABLE_MODEL:
+        raise ModelDisabledError("Zero-shot model disabled by CHATBOT_ENABLE_MODEL")
+    cached = classification_cache.get(query, labels)
+    if cached is not None:
+        return cached
+    if _batcher is None:
+        with _pipeline_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(_classify_batch, CHATBOT_BATCH_MAX_SIZE,
+                                        CHATBOT_BATCH_MAX_WAIT_MS / 1000.0, name="zero-shot-batcher")
+    result = _batcher.submit((query, tuple(labels))).result(timeout=CHATBOT_CLASSIFY_TIMEOUT)
+    classification_cache.remember(query, labels, result)
+    return result
+
+
+def preload_model():
+    """Load the shared pipeline now if the model is enabled"""
+    if CHATBOT_ENABLE_MODEL:
+        get_zero_shot_pipeline()
+
+
+def get_classifier(table, backend=CHATBOT_CLASSIFIER):
+    """Intent classifier for an intent -> keywords table, per CHATBOT_CLASSIFIER"""
+    return make_classifier(backend, table, classify)
+
+
+classification_cache.enable_persistence(CHATBOT_MODEL)
+
+
 class HuggingFaceChatbot:
     def __init__(self):
-        # Initialize the pipeline with the model
-        self.pipe = pipeline(
-            "zero-shot-classification", 
-            model="facebook/bart-large-mnli",
-            token=os.getenv("HUGGINGFACE_TOKEN")
-        )
-        
         # Define specific intents for our solar app
         self.intents = {
             "top_up": ["top up", "recharge", "add money", "payment"],
@@ -23,6 +117,9 @@ class HuggingFaceChatbot:
             "support": ["help", "support", "assistance", "contact"],
             "error": ["error", "problem", "issue", "not working"]
         }
+        # Compiled once; intents earlier in the table win when several match
+        self.intent_matcher = IntentMatcher(self.intents)
+        self.classifier = get_classifier(self.intents)
 
         # Define specific responses for each intent
         self.responses = {
@@ -58,15 +155,8 @@ class HuggingFaceChatbot:
 
     def get_response(self, query: str) -> str:
         try:
-            # Convert query to lowercase for better matching
-            query_lower = query.lower()
-            
-            # Find matching intent
-            matched_intent = None
-            for intent, keywords in self.intents.items():
-                if any(keyword in query_lower for keyword in keywords):
-                    matched_intent = intent
-                    break
+            # Find matching intent (case-insensitive, single pass over the query)
+            matched_intent = self.intent_matcher.match(query)
             
             if matched_intent:
                 # Get responses for the matched intent
@@ -81,10 +171,17 @@ class HuggingFaceChatbot:
             print(f"Error in get_response: {e}")
             return "I'm having trouble understanding. Could you rephrase your question?"
 
+    @property
+    def pipe(self):
+        """Shared zero-shot pipeline; see get_zero_shot_pipeline()"""
+        return get_zero_shot_pipeline()
+
     def get_confidence_scores(self, query: str) -> dict:
         try:
-            result = self.pipe(query, candidate_labels=list(self.intents.keys()))
+            result = self.classifier.classify(query, self.intents.keys())
             return dict(zip(result['labels'], result['scores']))
+        except ModelDisabledError:
+            return {}
         except Exception as e:
             print(f"Error getting confidence scores: {e}")
             return {}
@@ -98,7 +195,7 @@ class HuggingFaceChatbot:
 
         print("Uploading audio to AssemblyAI...")
         with open(audio_file_path, 'rb') as f:
-            upload_response = requests.post(upload_url, headers=headers, files={'file': f})
+            upload_response = http_client.post(upload_url, headers=headers, files={'file': f})
         print("Upload response status:", upload_response.status_code)
         print("Upload response text:", upload_response.text)
         if upload_response.status_code != 200:
@@ -106,7 +203,7 @@ class HuggingFaceChatbot:
         audio_url = upload_response.json()['upload_url']
 
         print("Requesting transcription...")
-        transcript_response = requests.post(
+        transcript_response = http_client.post(
             transcript_url,
             headers=headers,
             json={"audio_url": audio_url}
@@ -120,7 +217,7 @@ class HuggingFaceChatbot:
         print("Polling for transcription result...")
         import time
         while True:
-            poll_response = requests.get(f"{transcript_url}/{transcript_id}", headers=headers)
+            poll_response = http_client.get(f"{transcript_url}/{transcript_id}", headers=headers)
             status = poll_response.json()['status']
             print("Polling status:", status)
             if status == 'completed':
@@ -133,4 +230,8 @@ class HuggingFaceChatbot:
             time.sleep(1)
 
         # 2. Get AI response
-        return self.get_response(text) 
\ No newline at end of file
+        return self.get_response(text) 
+
+
+if CHATBOT_PRELOAD_MODEL:
+    preload_model()
@@ -1,15 +1,12 @@
-import psycopg2
-from psycopg2 import sql
-import os
 from dotenv import load_dotenv
-from support import initialize_db
+from migrations import migrate
 
 load_dotenv()
 
 def init_db():
-    """Initialize PostgreSQL database with required tables"""
+    """Initialize PostgreSQL database by applying pending schema migrations"""
     try:
-        initialize_db()  # Use the existing function from support.py
+        migrate()
         print("✅ PostgreSQL tables initialized successfully!")
     except Exception as e:
         print(f"🚨 Initialization failed: {e}")
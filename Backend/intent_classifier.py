@@ -0,0 +1,87 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import make_pipeline, make_union
+
+# Phrasings each keyword is expanded into, so the model sees keywords in
+# the kind of sentences users actually type
+TRAINING_TEMPLATES = [
+    "{}",
+    "how do i {}",
+    "i need {}",
+    "i want to {}",
+    "what is my {}",
+    "can you help with {}",
+    "my {}",
+    "is there a {}",
+]
+
+
+class TfidfIntentClassifier:
+    """Linear intent classifier trained from an intent -> keywords table.
+
+    Features are TF-IDF weighted words plus character 2-4-grams (so typos and
+    inflections still match); the model is a logistic regression. Training
+    takes milliseconds at start-up and a prediction well under one. Results
+    use the zero-shot pipeline's {"labels", "scores"} shape.
+    """
+
+    # Top scores below this are treated as guesses. Calibrated with
+    # bench_intent_classifier.py on the held-out intent_eval_set queries
+    low_confidence = 0.37
+
+    def __init__(self, table):
+        texts, targets = [], []
+        for intent, keywords in table.items():
+            for keyword in keywords:
+                for template in TRAINING_TEMPLATES:
+                    texts.append(template.format(keyword.lower()))
+                    targets.append(intent)
+        self.model = make_pipeline(
+            make_union(
+                TfidfVectorizer(analyzer="word", ngram_range=(1, 2), sublinear_tf=True),
+                TfidfVectorizer(analyzer="char_wb", ngram_range=(2, 4), sublinear_tf=True),
+            ),
+            LogisticRegression(max_iter=1000, C=10.0),
+        )
+        self.model.fit(texts, targets)
+        self.classes = list(self.model.classes_)
+
+    def classify(self, query, labels):
+        """Scores for `labels` (renormalized over them); unknown labels score 0"""
+        labels = list(labels)
+        probabilities = dict(zip(self.classes, self.model.predict_proba([query.lower()])[0]))
+        scores = np.array([probabilities.get(label, 0.0) for label in labels])
+        total = scores.sum()
+        if total > 0:
+            scores = scores / total
+        order = np.argsort(-scores, kind="stable")
+        return {
+            "sequence": query,
+            "labels": [labels[i] for i in order],
+            "scores": [float(scores[i]) for i in order],
+        }
+
+
+class ZeroShotIntentClassifier:
+    """Adapter for the (batched, cached) zero-shot pipeline in hugging_services"""
+
+    low_confidence = 0.7
+
+    def __init__(self, classify_fn):
+        self.classify_fn = classify_fn
+
+    def classify(self, query, labels):
+        return self.classify_fn(query, labels)
+
+
+BACKENDS = ("tfidf", "zero-shot")
+
+
+def make_classifier(backend, table, zero_shot_fn):
+    """Build the classifier named by `backend` (one of BACKENDS)"""
+    if backend == "zero-shot":
+        return ZeroShotIntentClassifier(zero_shot_fn)
+    if backend == "tfidf":
+        return TfidfIntentClassifier(table)
+    raise ValueError(f"Unknown classifier backend {backend!r}; expected one of {', '.join(BACKENDS)}")
@@ -0,0 +1,60 @@
+"""Held-out queries for evaluating EnhancedChatbot's intent classifier.
+
+Written as users phrase things, independently of the keyword tables the
+tfidf backend is trained from; do not add keywords to make these pass.
+Labels are EnhancedChatbot.candidate_labels, or None for queries that
+none of them covers (these should fall below the low-confidence threshold).
+"""
+
+HELD_OUT_QUERIES = [
+    ("when is my next instalment due", "payment"),
+    ("I was charged twice this month", "payment"),
+    ("can I settle my account with EFT", "payment"),
+    ("what happens if I miss a month", "payment"),
+    ("where can I see my outstanding amount", "payment"),
+    ("I want to pay off the system early", "payment"),
+
+    ("the app keeps crashing when I open it", "technical_support"),
+    ("my inverter screen shows code F12", "technical_support"),
+    ("the system won't turn on after the storm", "technical_support"),
+    ("nothing is charging since this morning", "technical_support"),
+    ("I can't log into the monitoring portal", "technical_support"),
+    ("the battery light is flashing red", "technical_support"),
+
+    ("how many units did my house use yesterday", "energy_consumption"),
+    ("why is my electricity bill so high", "energy_consumption"),
+    ("which appliances draw the most power", "energy_consumption"),
+    ("show me my usage for last week", "energy_consumption"),
+    ("how can I cut down on power during peak hours", "energy_consumption"),
+    ("compare this month's kilowatt hours to last month", "energy_consumption"),
+
+    ("when should someone come out to check the system", "maintenance"),
+    ("the panels are covered in bird droppings", "maintenance"),
+    ("how often do the batteries need servicing", "maintenance"),
+    ("book a technician visit for next week", "maintenance"),
+    ("do I need to wash the panels after a dust storm", "maintenance"),
+    ("is the annual inspection included in my contract", "maintenance"),
+
+    ("how much roof space do I need for a 5kW setup", "solar_panel"),
+    ("are monocrystalline panels better than polycrystalline", "solar_panel"),
+    ("can I add more panels to my current system", "solar_panel"),
+    ("what angle should the panels face", "solar_panel"),
+    ("how long do the panels last before they degrade", "solar_panel"),
+    ("will shading from a tree reduce my panel output", "solar_panel"),
+
+    ("how much power am I generating right now", "status"),
+    ("is everything running normally", "status"),
+    ("what is the battery charge level", "status"),
+    ("did the system produce anything today", "status"),
+    ("give me an overview of my system", "status"),
+    ("is my system online", "status"),
+
+    ("hello there", None),
+    ("what's the weather like in Durban", None),
+    ("tell me a joke", None),
+    ("who won the rugby on Saturday", None),
+    ("what time is it", None),
+    ("can you recommend a good restaurant", None),
+    ("asdf qwerty", None),
+    ("what is the capital of France", None),
+]
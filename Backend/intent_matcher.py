@@ -0,0 +1,87 @@
+from collections import deque, namedtuple
+
+Match = namedtuple("Match", ["intent", "keyword", "start", "end"])
+
+
+class IntentMatcher:
+    """Aho–Corasick automaton over an intent -> keywords table.
+
+    One pass over the lower-cased query finds every keyword occurrence,
+    however many intents there are. Priority is the table's order: when
+    several intents match, the one listed first wins, whatever its position
+    in the query. With `whole_words`, a keyword only counts when it is not
+    part of a longer word (like `\\b...\\b` in a regex).
+    """
+
+    def __init__(self, table, whole_words=False):
+        self.whole_words = whole_words
+        self.priority = {intent: rank for rank, intent in enumerate(table)}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for intent, keywords in table.items():
+            for keyword in keywords:
+                self._add(keyword.lower(), intent)
+        self._link()
+
+    def _add(self, keyword, intent):
+        if not keyword:
+            return
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((intent, keyword))
+
+    def _link(self):
+        """Breadth-first fill of failure links; outputs inherit their fail state's"""
+        queue = deque(self._goto[0].values())  # depth-1 states fail to the root
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find_all(self, text):
+        """Every keyword occurrence in `text`, as Matches ordered by end position"""
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for intent, keyword in out[state]:
+                start = i - len(keyword) + 1
+                if self.whole_words and not self._bounded(text, start, i + 1):
+                    continue
+                matches.append(Match(intent, keyword, start, i + 1))
+        return matches
+
+    @staticmethod
+    def _bounded(text, start, end):
+        return ((start == 0 or not text[start - 1].isalnum())
+                and (end == len(text) or not text[end].isalnum()))
+
+    def matched_intents(self, text):
+        """Distinct matched intents in priority order"""
+        return sorted({m.intent for m in self.find_all(text)}, key=self.priority.__getitem__)
+
+    def match(self, text):
+        """The highest-priority matched intent, or None"""
+        best = None
+        for m in self.find_all(text):
+            if best is None or self.priority[m.intent] < self.priority[best]:
+                best = m.intent
+        return best
@@ -0,0 +1,156 @@
+import os
+import threading
+import logging
+from datetime import datetime, timedelta, timezone
+
+from dotenv import load_dotenv
+
+import http_client
+from ttl_cache import RefreshingCache
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+ESKOMSEPUSH_API_URL = os.getenv("ESKOMSEPUSH_API_URL", "https://developer.sepush.co.za/business/2.0")
+ESKOM_TOKEN = os.getenv("ESKOM_TOKEN")
+BASE_ESKOM_URL = os.getenv("ESKOM_SITE_URL", "http://loadshedding.eskom.co.za")
+
+# Paid EskomSePush calls allowed per day; the quota resets at midnight SAST
+ESKOMSEPUSH_DAILY_QUOTA = int(os.getenv("ESKOMSEPUSH_DAILY_QUOTA", "50"))
+# Area schedules rarely change, so they are fetched at most this often per area
+LOADSHEDDING_AREA_TTL = int(os.getenv("LOADSHEDDING_AREA_TTL", "3600"))
+LOADSHEDDING_STAGE_TTL = int(os.getenv("LOADSHEDDING_STAGE_TTL", "120"))
+LOADSHEDDING_SCHEDULE_TTL = int(os.getenv("LOADSHEDDING_SCHEDULE_TTL", "3600"))
+AREA_SEARCH_TTL = int(os.getenv("AREA_SEARCH_TTL", "86400"))
+# How long expired data may still be served while it is refreshed (or while
+# the quota is exhausted)
+LOADSHEDDING_STALE_TTL = int(os.getenv("LOADSHEDDING_STALE_TTL", "21600"))
+LOADSHEDDING_TIMEOUT = float(os.getenv("LOADSHEDDING_TIMEOUT", "10"))
+
+SAST = timezone(timedelta(hours=2))
+
+
+class QuotaExceededError(Exception):
+    """Raised instead of calling EskomSePush once today's quota is spent"""
+
+
+class QuotaBudget:
+    """Thread-safe count of upstream calls made today against a daily limit"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._day = None
+        self.used = 0
+        self.rejected = 0
+
+    def _roll(self):
+        today = datetime.now(SAST).date()
+        if today != self._day:
+            self._day = today
+            self.used = 0
+            self.rejected = 0
+
+    def consume(self):
+        with self._lock:
+            self._roll()
+            if self.used >= self.limit:
+                self.rejected += 1
+                raise QuotaExceededError(f"EskomSePush daily quota of {self.limit} calls is used up")
+            self.used += 1
+
+    def stats(self):
+        with self._lock:
+            self._roll()
+            return {
+                "day": self._day.isoformat(),
+                "limit": self.limit,
+                "used": self.used,
+                "remaining": max(self.limit - self.used, 0),
+                "rejected": self.rejected,
+            }
+
+
+quota = QuotaBudget(ESKOMSEPUSH_DAILY_QUOTA)
+
+
+def fetch_area(area_id):
+    """Fetch an area's events and schedule from EskomSePush, bypassing the cache"""
+    quota.consume()
+    logger.info(f"Fetching load-shedding area {area_id} from EskomSePush")
+    # Every attempt is a paid call and a 429 means the quota is gone, so the
+    # client must not retry; the caches serve stale data instead
+    response = http_client.get(f"{ESKOMSEPUSH_API_URL}/area", headers={"Token": ESKOM_TOKEN},
+                               params={"id": area_id}, timeout=LOADSHEDDING_TIMEOUT, retries=0)
+    response.raise_for_status()
+    return response.json()
+
+
+def fetch_area_search(text):
+    """Search EskomSePush areas by name, bypassing the cache"""
+    quota.consume()
+    logger.info(f"Searching EskomSePush areas for {text!r}")
+    response = http_client.get(f"{ESKOMSEPUSH_API_URL}/areas_search", headers={"Token": ESKOM_TOKEN},
+                               params={"text": text}, timeout=LOADSHEDDING_TIMEOUT, retries=0)
+    response.raise_for_status()
+    return response.json().get("areas", [])
+
+
+def fetch_eskom(path):
+    """GET a path on the Eskom load-shedding site and return the body text"""
+    response = http_client.get(f"{BASE_ESKOM_URL}{path}", timeout=LOADSHEDDING_TIMEOUT)
+    response.raise_for_status()
+    return response.text
+
+
+area_cache = RefreshingCache(fetch_area, ttl=LOADSHEDDING_AREA_TTL,
+                             stale_ttl=LOADSHEDDING_STALE_TTL, maxsize=1024)
+stage_cache = RefreshingCache(lambda _: int(fetch_eskom("/LoadShedding/GetStatus")),
+                              ttl=LOADSHEDDING_STAGE_TTL, stale_ttl=LOADSHEDDING_STALE_TTL, maxsize=1)
+area_search_cache = RefreshingCache(fetch_area_search, ttl=AREA_SEARCH_TTL, maxsize=2048)
+eskom_cache = RefreshingCache(fetch_eskom, ttl=LOADSHEDDING_SCHEDULE_TTL,
+                              stale_ttl=LOADSHEDDING_STALE_TTL, maxsize=4096)
+
+
+def get_area(area_id):
+    """EskomSePush area payload ({"events", "info", "schedule"}), cached per area"""
+    return area_cache.get(area_id)
+
+
+def get_area_events(area_id):
+    return get_area(area_id).get("events", [])
+
+
+def get_national_stage():
+    """Current national stage as reported by Eskom, cached for LOADSHEDDING_STAGE_TTL"""
+    return stage_cache.get("national")
+
+
+def stage_from_status(status):
+    """Eskom GetStatus value as a stage: 0 for no load-shedding, None if unknown.
+
+    GetStatus reports the stage plus one (1 = not shedding) and values like
+    -1 or 99 when it has no answer.
+    """
+    return status - 1 if 1 <= status <= 9 else None
+
+
+def search_areas_upstream(text):
+    """EskomSePush areas matching `text`, cached per (lower-cased) search text"""
+    return area_search_cache.get(" ".join(text.lower().split()))
+
+
+def get_eskom_page(path):
+    """Cached body of an Eskom site lookup (municipalities, suburbs, schedules)"""
+    return eskom_cache.get(path)
+
+
+def stats():
+    return {
+        "quota": quota.stats(),
+        "areas": area_cache.stats(),
+        "stage": stage_cache.stats(),
+        "area_search": area_search_cache.stats(),
+        "eskom": eskom_cache.stats(),
+    }
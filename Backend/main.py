@@ -1,7 +1,9 @@
-from flask import Flask, request, jsonify, redirect, make_response
+from flask import Flask, request, jsonify, redirect, make_response, Response, stream_with_context
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
+from password_hashing import (hash_password, verify_password, needs_rehash,
+                              hash_password_async, verify_password_async,
+                              HashingBusyError, RETRY_AFTER_SECONDS)
 import psycopg2
 from psycopg2 import sql, OperationalError
 from datetime import timedelta, datetime
@@ -14,9 +16,18 @@ from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import Optional, List
 import threading
+import csv
+import io
+import json
 import uvicorn
 from flask import Blueprint, url_for, session
 from email_utils import send_welcome_email
+from db_pool import pool_stats
+import user_cache
+import classification_cache
+from support import (get_user_by_email, get_user_contracts_page, get_payment_history_page,
+                     stream_export, EXPORT_QUERIES)
+import async_support
 from app import create_app
 from hugging_services import HuggingFaceChatbot
 from app.routes.home import home_bp
@@ -28,6 +39,10 @@ load_dotenv()
 # Configuration (use environment variables for secrets in production)
 SECRET_KEY = os.getenv('SECRET_KEY', secrets.token_hex(32))
 JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', secrets.token_hex(32))
+# Comma-separated user ids allowed to use the admin export endpoints
+ADMIN_USER_IDS = {int(i) for i in os.getenv('ADMIN_USER_IDS', '').split(',') if i.strip().isdigit()}
+# Rows serialized per chunk written to streaming export responses
+EXPORT_CHUNK_ROWS = 500
 
 # ================= FLASK APP =================
 # Rename existing app to flask_app
@@ -96,6 +111,9 @@ def flask_register():
         # Get optional phone or set None
         phone = data.get('phone', None)
 
+        # Hash before checking out a connection so it isn't held while hashing
+        hashed_pw = hash_password(data['password'])
+
         conn = get_db()
         if not conn:
             return jsonify({'success': False, 'message': 'Database error'}), 500
@@ -107,7 +125,6 @@ def flask_register():
                 return jsonify({'success': False, 'message': 'Email already exists'}), 400
 
             # Create user without phone
-            hashed_pw = generate_password_hash(data['password'])
             cur.execute(
                 """INSERT INTO users (email, password_hash, full_name, phone)
                 VALUES (%s, %s, %s, %s) RETURNING id, email, full_name""",
@@ -127,6 +144,8 @@ def flask_register():
             }
         }), 201
 
+    except HashingBusyError:
+        return jsonify({'success': False, 'message': 'Server busy, please retry'}), 503, {'Retry-After': str(RETRY_AFTER_SECONDS)}
     except Exception as e:
         print(f"Registration Error: {str(e)}")
         return jsonify({'success': False, 'message': 'Registration failed'}), 500
@@ -157,7 +176,16 @@ def flask_login():
         cur.execute('SELECT id, email, password_hash, full_name FROM users WHERE email = %s', (email,))
         user = cur.fetchone()
 
-        if user and check_password_hash(user[2], password):  # user[2] = password_hash
+        if user and verify_password(user[2], password):  # user[2] = password_hash
+            if needs_rehash(user[2]):
+                try:
+                    cur.execute('UPDATE users SET password_hash = %s WHERE id = %s',
+                                (hash_password(password), user[0]))
+                    conn.commit()
+                    user_cache.invalidate(user_id=user[0])
+                except Exception as e:
+                    conn.rollback()
+                    print(f"Password rehash failed: {str(e)}")
             access_token = create_access_token(identity=user[0])  # user[0] = id
             return jsonify({
                 'success': True,
@@ -172,6 +200,8 @@ def flask_login():
 
         return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
 
+    except HashingBusyError:
+        return jsonify({'success': False, 'message': 'Server busy, please retry'}), 503, {'Retry-After': str(RETRY_AFTER_SECONDS)}
     except Exception as e:
         app.logger.error(f"Login error: {str(e)}")
         return jsonify({'success': False, 'message': 'Login failed'}), 500
@@ -206,13 +236,104 @@ def flask_record_payment():
     # Add validation and call support.py's record_payment()
     # ... implementation ...
 
+def _current_user_id():
+    """Resolve the JWT identity (a user id, or an email for OAuth logins) to a user id"""
+    identity = get_jwt_identity()
+    try:
+        return int(identity)
+    except (TypeError, ValueError):
+        user = get_user_by_email(identity)
+        return user['id'] if user else None
+
 @flask_app.route('/api/contracts', methods=['GET'])
 @jwt_required()
 def flask_get_contracts():
-    """Get user's solar contracts"""
-    current_user = get_jwt_identity()
-    # Add authorization and call support.py's get_user_contracts()
-    # ... implementation ...
+    """Get user's solar contracts, one page at a time (?limit=&cursor=)"""
+    user_id = _current_user_id()
+    if user_id is None:
+        return jsonify({'success': False, 'message': 'User not found'}), 404
+    try:
+        contracts, next_cursor = get_user_contracts_page(
+            user_id, request.args.get('limit', type=int), request.args.get('cursor')
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, 'contracts': contracts, 'next_cursor': next_cursor})
+
+@flask_app.route('/api/contracts/<int:contract_id>/payments', methods=['GET'])
+@jwt_required()
+def flask_get_contract_payments(contract_id):
+    """Get a contract's payment history, newest first, one page at a time"""
+    user_id = _current_user_id()
+    if user_id is None:
+        return jsonify({'success': False, 'message': 'User not found'}), 404
+    try:
+        payments, next_cursor = get_payment_history_page(
+            contract_id, request.args.get('limit', type=int), request.args.get('cursor'),
+            user_id=user_id
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, 'payments': payments, 'next_cursor': next_cursor})
+
+def _csv_chunks(columns, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for i, row in enumerate(rows, 1):
+        writer.writerow(row)
+        if i % EXPORT_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def _ndjson_chunks(columns, rows):
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, row)), default=str))
+        if len(lines) == EXPORT_CHUNK_ROWS:
+            yield '\n'.join(lines) + '\n'
+            lines = []
+    if lines:
+        yield '\n'.join(lines) + '\n'
+
+@flask_app.route('/api/admin/export/<table>', methods=['GET'])
+@jwt_required()
+def flask_export_table(table):
+    """Stream every contract or payment as CSV (default) or NDJSON (?format=ndjson)"""
+    if _current_user_id() not in ADMIN_USER_IDS:
+        return jsonify({'success': False, 'message': 'Admin access required'}), 403
+    if table not in EXPORT_QUERIES:
+        return jsonify({'success': False, 'message': f'Unknown export: {table}'}), 404
+
+    export_format = request.args.get('format', 'csv')
+    columns, rows = stream_export(table)
+    if export_format == 'ndjson':
+        body, mimetype, extension = _ndjson_chunks(columns, rows), 'application/x-ndjson', 'ndjson'
+    elif export_format == 'csv':
+        body, mimetype, extension = _csv_chunks(columns, rows), 'text/csv', 'csv'
+    else:
+        rows.close()
+        return jsonify({'success': False, 'message': 'format must be csv or ndjson'}), 400
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={table}.{extension}'}
+    )
+
+@flask_app.route('/api/health/db', methods=['GET'])
+@jwt_required()
+def flask_db_pool_health():
+    """Expose connection pool metrics (in-use, waiting, checkout latency)"""
+    return jsonify(pool_stats())
+
+@flask_app.route('/api/health/cache', methods=['GET'])
+@jwt_required()
+def flask_cache_health():
+    """Expose user and chatbot classification cache hit/miss counters"""
+    return jsonify({'users': user_cache.stats(), 'classifications': classification_cache.stats()})
 
 @flask_app.errorhandler(404)
 def not_found(e):
@@ -244,61 +365,65 @@ class UserLogin(BaseModel):
     email: str
     password: str
 
+@app.on_event("startup")
+async def fastapi_startup():
+    await async_support.get_async_pool()
+
+@app.on_event("shutdown")
+async def fastapi_shutdown():
+    await async_support.close_async_pool()
+
 # --- FastAPI Routes ---
 @app.post("/fastapi/auth/register")
 async def fastapi_register(user: UserRegister):
     """FastAPI version of /api/auth/register"""
-    conn = None
     try:
-        conn = get_db()
-        with conn.cursor() as cur:
-            cur.execute("SELECT id FROM users WHERE email = %s", (user.email,))
-            if cur.fetchone():
-                raise HTTPException(status_code=400, detail="Email exists")
+        if await async_support.get_user_by_email(user.email):
+            raise HTTPException(status_code=400, detail="Email exists")
 
-            hashed_pw = generate_password_hash(user.password)
-            cur.execute(
-                """INSERT INTO users (email, password_hash, full_name, phone)
-                VALUES (%s, %s, %s, %s) RETURNING id, email, full_name""",
-                (user.email, hashed_pw, user.name, user.phone)
-            )
-            user_data = cur.fetchone()
-            conn.commit()
+        hashed_pw = await hash_password_async(user.password)
+        user_data = await async_support.create_user(user.email, hashed_pw, user.name, user.phone)
 
         return {
             "success": True,
             "user": {"id": user_data[0], "email": user_data[1], "name": user_data[2]}
         }
+    except HTTPException:
+        raise
+    except HashingBusyError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry",
+                            headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if conn: conn.close()
 
 @app.post("/fastapi/auth/login")
 async def fastapi_login(user: UserLogin):
     """FastAPI version of /api/auth/login"""
-    conn = None
     try:
-        conn = get_db()
-        with conn.cursor() as cur:
-            cur.execute(
-                'SELECT id, email, password_hash, full_name FROM users WHERE email = %s',
-                (user.email,)
-            )
-            db_user = cur.fetchone()
-
-            if db_user and check_password_hash(db_user[2], user.password):
-                token = create_access_token(identity=db_user[0])
-                return {
-                    "success": True,
-                    "token": token,
-                    "user": {"id": db_user[0], "name": db_user[3], "email": db_user[1]}
-                }
+        db_user = await async_support.get_user_by_email(user.email)
+
+        if db_user and await verify_password_async(db_user['password_hash'], user.password):
+            if needs_rehash(db_user['password_hash']):
+                try:
+                    new_hash = await hash_password_async(user.password)
+                    await async_support.update_password_hash(db_user['id'], new_hash)
+                except Exception as e:
+                    print(f"Password rehash failed: {str(e)}")
+            with flask_app.app_context():
+                token = create_access_token(identity=db_user['id'])
+            return {
+                "success": True,
+                "token": token,
+                "user": {"id": db_user['id'], "name": db_user['full_name'], "email": db_user['email']}
+            }
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    except HTTPException:
+        raise
+    except HashingBusyError:
+        raise HTTPException(status_code=503, detail="Server busy, please retry",
+                            headers={"Retry-After": str(RETRY_AFTER_SECONDS)})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        if conn: conn.close()
 
 # Initialize chatbot
 chatbot = HuggingFaceChatbot()
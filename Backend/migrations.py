@@ -0,0 +1,161 @@
+import argparse
+
+from db_pool import pooled_connection
+
+# Arbitrary constant identifying the migration advisory lock, so concurrent
+# deploys wait for each other instead of racing on the same DDL
+MIGRATION_LOCK_ID = 727401
+
+# ================== MIGRATIONS ==================
+# Append new migrations at the end; never edit or renumber applied ones.
+MIGRATIONS = [
+    (1, "initial schema", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            email VARCHAR(255) UNIQUE NOT NULL,
+            password_hash VARCHAR(255) NOT NULL,
+            full_name VARCHAR(100),
+            phone VARCHAR(20),
+            is_installer BOOLEAN DEFAULT FALSE
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS solar_systems (
+            id SERIAL PRIMARY KEY,
+            installer_id INTEGER REFERENCES users(id),
+            capacity_kw DECIMAL(5,2) NOT NULL,
+            components TEXT,
+            installation_date DATE
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS solar_contracts (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+            system_id INTEGER REFERENCES solar_systems(id),
+            monthly_payment DECIMAL(10,2) NOT NULL,
+            total_cost DECIMAL(10,2) NOT NULL,
+            payments_made DECIMAL(10,2) DEFAULT 0.0,
+            start_date DATE NOT NULL,
+            end_date DATE,
+            is_active BOOLEAN DEFAULT TRUE,
+            CONSTRAINT valid_payment CHECK (monthly_payment > 0 AND total_cost > monthly_payment)
+        )""",
+        """
+        CREATE TABLE IF NOT EXISTS payments (
+            id SERIAL PRIMARY KEY,
+            contract_id INTEGER REFERENCES solar_contracts(id) ON DELETE CASCADE,
+            amount DECIMAL(10,2) NOT NULL,
+            payment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            payment_method VARCHAR(50)
+        )""",
+    ]),
+    (2, "indexes for contract and payment lookups", [
+        # (payment_date, id) is the keyset used by get_payment_history_page
+        "CREATE INDEX IF NOT EXISTS idx_payments_contract_date ON payments (contract_id, payment_date DESC, id DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_solar_contracts_user_id ON solar_contracts (user_id, id)",
+        "CREATE INDEX IF NOT EXISTS idx_solar_systems_installer_id ON solar_systems (installer_id)",
+    ]),
+    (3, "per-contract balance summaries", [
+        # Amounts stay on solar_contracts.payments_made; this table holds the
+        # per-contract payment aggregates that would otherwise need a scan
+        """
+        CREATE TABLE IF NOT EXISTS contract_balance_summaries (
+            contract_id INTEGER PRIMARY KEY REFERENCES solar_contracts(id) ON DELETE CASCADE,
+            payment_count INTEGER NOT NULL DEFAULT 0,
+            last_payment_at TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )""",
+        """
+        INSERT INTO contract_balance_summaries (contract_id, payment_count, last_payment_at)
+        SELECT contract_id, COUNT(*), MAX(payment_date)
+        FROM payments
+        GROUP BY contract_id
+        ON CONFLICT (contract_id) DO NOTHING
+        """,
+    ]),
+    (4, "forecast area per solar system", [
+        # Keys into weather_service.AREA_COORDINATES for yield estimates
+        "ALTER TABLE solar_systems ADD COLUMN IF NOT EXISTS area_id VARCHAR(50)",
+        "CREATE INDEX IF NOT EXISTS idx_solar_systems_area_id ON solar_systems (area_id)",
+    ]),
+    (5, "case-insensitive email lookups", [
+        # Older rows keep the case they were registered with; lookups compare
+        # lower(email) against the normalized address
+        "CREATE INDEX IF NOT EXISTS idx_users_email_lower ON users (lower(email))",
+    ]),
+]
+
+
+def _ensure_version_table(cur):
+    cur.execute("""
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INTEGER PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )""")
+
+
+def applied_versions():
+    """Versions already recorded in schema_migrations"""
+    with pooled_connection() as conn, conn.cursor() as cur:
+        _ensure_version_table(cur)
+        conn.commit()
+        cur.execute("SELECT version FROM schema_migrations")
+        return {row[0] for row in cur.fetchall()}
+
+
+def migrate(target=None):
+    """Apply pending migrations up to `target` (default: latest).
+
+    Each migration runs in its own transaction together with its
+    schema_migrations row. Returns the list of versions applied.
+    """
+    applied = []
+    with pooled_connection() as conn, conn.cursor() as cur:
+        try:
+            _ensure_version_table(cur)
+            conn.commit()
+
+            for version, name, statements in MIGRATIONS:
+                if target is not None and version > target:
+                    break
+                # Held until commit; re-checked so a concurrent deploy's work is skipped
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (MIGRATION_LOCK_ID,))
+                cur.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+                if cur.fetchone():
+                    conn.rollback()
+                    continue
+                for statement in statements:
+                    cur.execute(statement)
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (version, name)
+                )
+                conn.commit()
+                applied.append(version)
+                print(f"✅ Applied migration {version}: {name}")
+        except Exception as e:
+            conn.rollback()
+            print(f"🚨 Migration failed: {e}")
+            raise
+    return applied
+
+
+def status():
+    done = applied_versions()
+    for version, name, _ in MIGRATIONS:
+        print(f"{'[x]' if version in done else '[ ]'} {version}: {name}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument('command', nargs='?', default='upgrade', choices=['upgrade', 'status'])
+    parser.add_argument('--target', type=int, help="Stop after this migration version")
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        status()
+    else:
+        versions = migrate(args.target)
+        if not versions:
+            print("✅ Database schema is up to date")
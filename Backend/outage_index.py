@@ -0,0 +1,133 @@
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from itertools import accumulate
+
+from loadshedding_service import SAST, area_cache
+
+
+def to_timestamp(value):
+    """Epoch seconds for an ISO-8601 string, datetime or number.
+
+    Times without an offset are taken to be SAST, EskomSePush's zone,
+    whatever the server's local zone is.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=SAST)
+    return value.timestamp()
+
+
+class AreaTimeline:
+    """Immutable, start-sorted outage intervals for one area.
+
+    Intervals are half-open [start, end). Alongside the sorted starts it
+    keeps a running maximum of the ends, so point and range queries need
+    only a binary search plus the matching events.
+    """
+
+    def __init__(self, events):
+        parsed = sorted(
+            ((to_timestamp(e["start"]), to_timestamp(e["end"]), e) for e in events),
+            key=lambda item: item[0]
+        )
+        self.starts = [start for start, _, _ in parsed]
+        self.ends = [end for _, end, _ in parsed]
+        self.events = [event for _, _, event in parsed]
+        self.max_ends = list(accumulate(self.ends, max))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def active(self, at):
+        """Events covering `at`"""
+        hi = bisect_right(self.starts, at)
+        lo = bisect_right(self.max_ends, at, 0, hi)
+        return [self.events[i] for i in range(lo, hi) if self.ends[i] > at]
+
+    def is_shedding(self, at):
+        hi = bisect_right(self.starts, at)
+        return hi > 0 and self.max_ends[hi - 1] > at
+
+    def between(self, start, end):
+        """Events overlapping [start, end), in start order"""
+        hi = bisect_left(self.starts, end)
+        lo = bisect_right(self.max_ends, start, 0, hi)
+        return [self.events[i] for i in range(lo, hi) if self.ends[i] > start]
+
+    def next_event(self, after):
+        """First event starting at or after `after`, or None"""
+        i = bisect_left(self.starts, after)
+        return self.events[i] if i < len(self.events) else None
+
+
+class OutageIndex:
+    """Per-area AreaTimelines built from the cached EskomSePush area payloads.
+
+    Queries never touch the network: for an area whose schedule is not in
+    loadshedding_service's cache they return None (unknown), which is not
+    the same as an empty schedule. A timeline is rebuilt only when the
+    cached payload for its area changes.
+    """
+
+    def __init__(self, cache=area_cache):
+        self.cache = cache
+        self._timelines = {}
+        self._lock = threading.Lock()
+
+    def timeline(self, area_id):
+        """The area's AreaTimeline, or None if its schedule is not cached"""
+        cached = self.cache.peek(area_id)
+        if cached is None:
+            return None
+        payload = cached[0]
+        with self._lock:
+            built = self._timelines.get(area_id)
+        if built is not None and built[0] is payload:
+            return built[1]
+
+        timeline = AreaTimeline(payload.get("events", []))
+        with self._lock:
+            self._timelines[area_id] = (payload, timeline)
+        return timeline
+
+    def is_shedding(self, area_id, at=None):
+        timeline = self.timeline(area_id)
+        return timeline.is_shedding(to_timestamp(time.time() if at is None else at)) if timeline else None
+
+    def active_events(self, area_id, at=None):
+        timeline = self.timeline(area_id)
+        return timeline.active(to_timestamp(time.time() if at is None else at)) if timeline else None
+
+    def events_between(self, area_id, start, end):
+        timeline = self.timeline(area_id)
+        return timeline.between(to_timestamp(start), to_timestamp(end)) if timeline else None
+
+    def next_event(self, area_id, after=None):
+        timeline = self.timeline(area_id)
+        return timeline.next_event(to_timestamp(time.time() if after is None else after)) if timeline else None
+
+    def status_many(self, area_ids, at=None):
+        """{area_id: {"known", "shedding", "next_event"}} for many areas at one instant.
+
+        Areas whose schedule is not cached have "known": False and None
+        for the other fields.
+        """
+        at = to_timestamp(time.time() if at is None else at)
+        result = {}
+        for area_id in area_ids:
+            timeline = self.timeline(area_id)
+            known = timeline is not None
+            result[area_id] = {
+                "known": known,
+                "shedding": timeline.is_shedding(at) if known else None,
+                "next_event": timeline.next_event(at) if known else None,
+            }
+        return result
+
+
+outage_index = OutageIndex()
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from dotenv import load_dotenv
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+
+# Load environment variables
+load_dotenv()
+
+# Werkzeug method string, optionally with its cost parameters, e.g.
+# "scrypt:32768:8:1" or "pbkdf2:sha256:1000000". Stored hashes made with a
+# weaker algorithm or lower cost are upgraded on the next successful login.
+PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 1)))
+# Requests beyond this many queued/running hashes are rejected immediately
+HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', str(HASH_WORKERS * 4)))
+HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', '10'))
+# Seconds clients are told to wait before retrying when the pool is saturated
+RETRY_AFTER_SECONDS = 1
+
+
+class HashingBusyError(Exception):
+    """Raised when the hashing queue is full and the caller should back off"""
+
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(HASH_MAX_PENDING)
+
+
+def _get_executor():
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ProcessPoolExecutor(max_workers=HASH_WORKERS)
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def _submit(fn, *args):
+    if not _pending.acquire(blocking=False):
+        raise HashingBusyError("Password hashing queue is full, please retry shortly")
+    try:
+        future = _get_executor().submit(fn, *args)
+    except Exception:
+        _pending.release()
+        raise
+    future.add_done_callback(lambda _: _pending.release())
+    return future
+
+
+# ================== SYNC API (Flask) ==================
+def hash_password(password):
+    """Hash a password on the worker pool, blocking the calling thread only"""
+    return _submit(generate_password_hash, password, PASSWORD_HASH_METHOD).result(timeout=HASH_TIMEOUT)
+
+
+def verify_password(password_hash, password):
+    """Check a password against a stored hash on the worker pool"""
+    return _submit(check_password_hash, password_hash, password).result(timeout=HASH_TIMEOUT)
+
+
+# ================== ASYNC API (FastAPI) ==================
+async def hash_password_async(password):
+    future = asyncio.wrap_future(_submit(generate_password_hash, password, PASSWORD_HASH_METHOD))
+    return await asyncio.wait_for(future, HASH_TIMEOUT)
+
+
+async def verify_password_async(password_hash, password):
+    future = asyncio.wrap_future(_submit(check_password_hash, password_hash, password))
+    return await asyncio.wait_for(future, HASH_TIMEOUT)
+
+
+# Algorithms from weakest to strongest; hashes are never moved down this list
+_ALGORITHM_STRENGTH = {'pbkdf2': 0, 'scrypt': 1}
+
+
+def _cost(method):
+    """(algorithm strength, cost parameters) of a werkzeug method string, or None"""
+    algorithm, *params = method.split(':')
+    try:
+        if algorithm == 'scrypt':
+            return _ALGORITHM_STRENGTH[algorithm], tuple(int(v) for v in params) if params else (2 ** 15, 8, 1)
+        if algorithm == 'pbkdf2':
+            iterations = int(params[1]) if len(params) > 1 else DEFAULT_PBKDF2_ITERATIONS
+            return _ALGORITHM_STRENGTH[algorithm], (iterations,)
+    except ValueError:
+        pass
+    return None
+
+
+def needs_rehash(password_hash):
+    """True when a stored hash is weaker than PASSWORD_HASH_METHOD.
+
+    A hash made with a weaker algorithm (pbkdf2 when scrypt is configured)
+    or with any lower cost parameter is upgraded; a stronger one (scrypt
+    when pbkdf2 is configured) is left alone.
+    """
+    if not password_hash or '$' not in password_hash:
+        return False
+    stored, target = _cost(password_hash.split('$', 1)[0]), _cost(PASSWORD_HASH_METHOD)
+    if stored is None or target is None:
+        return False
+    if stored[0] != target[0]:
+        return stored[0] < target[0]
+    return any(have < want for have, want in zip(stored[1], target[1]))
@@ -1,26 +1,73 @@
 import psycopg2
 from psycopg2 import OperationalError
+from psycopg2.extras import execute_values
+from decimal import Decimal
+from itertools import islice
+from datetime import datetime
+import base64
+import json
 import os
+import uuid
 from dotenv import load_dotenv
-import pandas as pd
-import plotly.express as px
-import json
-import datetime
+from db_pool import db_settings, pooled_connection
+import user_cache
+from migrations import migrate
 
 # Load environment variables
 load_dotenv()
 
+# Rows sent per INSERT statement by the batch helpers
+BATCH_PAGE_SIZE = int(os.getenv('DB_BATCH_PAGE_SIZE', '1000'))
+
+# Rows fetched per round trip by server-side (streaming) cursors
+STREAM_ITERSIZE = int(os.getenv('DB_STREAM_ITERSIZE', '2000'))
+
+# Page sizes for the keyset-paginated readers
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+CONTRACT_COLUMNS = ['id', 'user_id', 'system_id', 'monthly_payment', 'total_cost', 'payments_made',
+                    'start_date', 'end_date', 'is_active', 'capacity_kw', 'components']
+PAYMENT_COLUMNS = ['id', 'amount', 'payment_date', 'payment_method']
+SUMMARY_COLUMNS = ['contract_id', 'user_id', 'total_cost', 'monthly_payment', 'payments_made',
+                   'outstanding_balance', 'payments_remaining', 'arrears',
+                   'payment_count', 'last_payment_at']
+
+# Folds new payments into contract_balance_summaries; shared by the single
+# and batched payment writers so both keep the summary in the same transaction
+SUMMARY_UPSERT = """
+INSERT INTO contract_balance_summaries (contract_id, payment_count, last_payment_at)
+VALUES {values}
+ON CONFLICT (contract_id) DO UPDATE SET
+    payment_count = contract_balance_summaries.payment_count + EXCLUDED.payment_count,
+    last_payment_at = GREATEST(contract_balance_summaries.last_payment_at, EXCLUDED.last_payment_at),
+    updated_at = CURRENT_TIMESTAMP
+"""
+
+# Balance figures derived per contract row; installments fall due monthly
+# from start_date, including the month the contract starts
+SUMMARY_SELECT = """
+SELECT sc.id, sc.user_id, sc.total_cost, sc.monthly_payment, sc.payments_made,
+       GREATEST(sc.total_cost - sc.payments_made, 0) AS outstanding_balance,
+       CEIL(GREATEST(sc.total_cost - sc.payments_made, 0) / sc.monthly_payment)::integer AS payments_remaining,
+       GREATEST(LEAST(sc.total_cost, sc.monthly_payment * due.installments) - sc.payments_made, 0) AS arrears,
+       COALESCE(s.payment_count, 0) AS payment_count,
+       s.last_payment_at
+FROM solar_contracts sc
+LEFT JOIN contract_balance_summaries s ON s.contract_id = sc.id
+CROSS JOIN LATERAL (
+    SELECT CASE WHEN sc.start_date > CURRENT_DATE THEN 0
+                ELSE EXTRACT(YEAR FROM age(CURRENT_DATE, sc.start_date)) * 12
+                     + EXTRACT(MONTH FROM age(CURRENT_DATE, sc.start_date)) + 1
+           END AS installments
+) due
+"""
+
 # ================== DATABASE CONNECTION ==================
 def connect_db():
-    """Connect to PostgreSQL database"""
+    """Open a dedicated (unpooled) connection, for one-off scripts"""
     try:
-        conn = psycopg2.connect(
-            host=os.getenv('DB_HOST', 'localhost'),
-            database=os.getenv('DB_NAME', 'Fintech_Solar'),
-            user=os.getenv('DB_USER', 'postgres'),
-            password=os.getenv('DB_PASSWORD', ''),
-            port=os.getenv('DB_PORT', '5432')
-        )
+        conn = psycopg2.connect(**db_settings())
         return conn, conn.cursor()
     except OperationalError as e:
         print(f"🚨 Database connection failed: {e}")
@@ -28,56 +75,170 @@ def connect_db():
 
 # ================== CORE FUNCTIONS ==================
 def execute_query(operation=None, query=None, params=None):
-    """Execute a database query"""
-    conn, cur = connect_db()
-    if not conn or not cur:
-        raise Exception("Database connection failed")
+    """Execute a database query on a pooled connection.
+
+    operation='stream' returns a generator over the rows instead of a list
+    (see stream_query).
+    """
+    if operation == 'stream':
+        return stream_query(query, params)
+
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            try:
+                if params:
+                    cur.execute(query, params)
+                else:
+                    cur.execute(query)
+
+                if operation == 'search':
+                    return cur.fetchall()
+                elif operation == 'insert':
+                    conn.commit()
+                    return cur.fetchone()[0] if cur.description else None
+            except Exception as e:
+                conn.rollback()
+                print(f"🚨 Query failed: {e}\nQuery: {query}")
+                raise
 
+def stream_query(query, params=None, itersize=STREAM_ITERSIZE):
+    """Yield result rows from a named server-side cursor.
+
+    Only `itersize` rows are held in memory at a time, however large the
+    result. The pooled connection stays checked out until the generator
+    is exhausted or closed, so consume it promptly.
+    """
+    with pooled_connection() as conn:
+        with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cur:
+            cur.itersize = itersize
+            try:
+                cur.execute(query, params)
+                for row in cur:
+                    yield row
+            except Exception as e:
+                print(f"🚨 Streaming query failed: {e}\nQuery: {query}")
+                raise
+
+def _batches(rows, fields, defaults, size):
+    """Yield lists of parameter tuples from tuples or dicts, `size` at a time"""
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        batch = []
+        for row in chunk:
+            if isinstance(row, dict):
+                values = tuple(row.get(f, defaults.get(f)) for f in fields)
+            else:
+                values = tuple(row) + tuple(defaults[f] for f in fields[len(row):])
+            batch.append(values)
+        yield batch
+
+def execute_batch_insert(query, rows, fields, defaults=None, page_size=BATCH_PAGE_SIZE):
+    """Insert many rows in one transaction, returning generated ids in order.
+
+    `query` must contain a single `VALUES %s` placeholder and `RETURNING id`.
+    Rows are streamed from the iterable `page_size` at a time, so callers can
+    pass generators over large imports.
+    """
+    ids = []
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            try:
+                for batch in _batches(rows, fields, defaults or {}, page_size):
+                    result = execute_values(cur, query, batch, page_size=page_size, fetch=True)
+                    ids.extend(r[0] for r in result)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"🚨 Batch insert failed: {e}\nQuery: {query}")
+                raise
+    return ids
+
+def encode_cursor(*values):
+    """Opaque pagination cursor for the last row of a page"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor, *types):
+    """Inverse of encode_cursor(); `types` are the expected type of each value.
+
+    Raises ValueError for malformed cursors or ones of the wrong shape.
+    """
     try:
-        if params:
-            cur.execute(query, params)
-        else:
-            cur.execute(query)
-
-        if operation == 'search':
-            return cur.fetchall()
-        elif operation == 'insert':
-            conn.commit()
-            return cur.fetchone()[0] if cur.description else None
-    except Exception as e:
-        conn.rollback()
-        print(f"🚨 Query failed: {e}\nQuery: {query}")
-        raise
-    finally:
-        if cur: cur.close()
-        if conn: conn.close()
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise ValueError("Invalid pagination cursor")
+    if (not isinstance(values, list) or len(values) != len(types)
+            or any(isinstance(v, bool) or not isinstance(v, t) for v, t in zip(values, types))):
+        raise ValueError("Invalid pagination cursor")
+    return values
+
+def _page_limit(limit):
+    return max(1, min(int(limit or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
 
 # ================== USER OPERATIONS ==================
 def create_user(email, password_hash, full_name=None, phone=None, is_installer=False):
     """Create a new user account"""
+    email = user_cache.normalize_email(email)
     query = """
     INSERT INTO users (email, password_hash, full_name, phone)
     VALUES (%s, %s, %s, %s) RETURNING id
     """
-    return execute_query('insert', query, (email, password_hash, full_name, phone))
+    user_id = execute_query('insert', query, (email, password_hash, full_name, phone))
+    # Drop any cached "unknown email" entry left by the pre-registration check
+    user_cache.invalidate(email=email)
+    return user_id
 
 def get_user_by_email(email):
-    """Get user by email address"""
-    query = "SELECT id, email, password_hash, full_name, phone FROM users WHERE email = %s"
+    """Get user by email address (read-through cache)"""
+    email = user_cache.normalize_email(email)
+    cached = user_cache.get_by_email(email)
+    if cached is user_cache.NOT_FOUND:
+        return None
+    if cached is not None:
+        return cached
+
+    query = "SELECT id, email, password_hash, full_name, phone FROM users WHERE lower(email) = %s ORDER BY id LIMIT 1"
     result = execute_query('search', query, (email,))
     if result:
         columns = ['id', 'email', 'password_hash', 'full_name', 'phone']
-        return dict(zip(columns, result[0]))
+        user = dict(zip(columns, result[0]))
+        user_cache.remember(user)
+        return user
+    user_cache.remember_missing(email)
     return None
 
+def update_password_hash(user_id, password_hash):
+    """Replace a user's stored password hash (e.g. after a cost upgrade)"""
+    query = "UPDATE users SET password_hash = %s WHERE id = %s RETURNING id"
+    result = execute_query('insert', query, (password_hash, user_id))
+    user_cache.invalidate(user_id=user_id)
+    return result
+
 # ================== SOLAR SYSTEM OPERATIONS ==================
-def add_solar_system(installer_id, capacity_kw, components=None, installation_date=None):
+def add_solar_system(installer_id, capacity_kw, components=None, installation_date=None, area_id=None):
     """Add a new solar system installation"""
     query = """
-    INSERT INTO solar_systems (installer_id, capacity_kw, components, installation_date)
-    VALUES (%s, %s, %s, %s) RETURNING id
+    INSERT INTO solar_systems (installer_id, capacity_kw, components, installation_date, area_id)
+    VALUES (%s, %s, %s, %s, %s) RETURNING id
+    """
+    return execute_query('insert', query, (installer_id, capacity_kw, components, installation_date, area_id))
+
+def add_solar_systems(systems, page_size=BATCH_PAGE_SIZE):
+    """Add many solar systems in one transaction.
+
+    `systems` yields tuples in add_solar_system() argument order or dicts
+    keyed by argument name. Returns the new ids in input order.
+    """
+    query = """
+    INSERT INTO solar_systems (installer_id, capacity_kw, components, installation_date, area_id)
+    VALUES %s RETURNING id
     """
-    return execute_query('insert', query, (installer_id, capacity_kw, components, installation_date))
+    fields = ('installer_id', 'capacity_kw', 'components', 'installation_date', 'area_id')
+    defaults = {'components': None, 'installation_date': None, 'area_id': None}
+    return execute_batch_insert(query, systems, fields, defaults, page_size)
 
 # ================== CONTRACT OPERATIONS ==================
 def create_contract(user_id, system_id, monthly_payment, total_cost, start_date, end_date=None):
@@ -90,6 +251,16 @@ def create_contract(user_id, system_id, monthly_payment, total_cost, start_date,
     return execute_query('insert', query, 
                        (user_id, system_id, monthly_payment, total_cost, start_date, end_date))
 
+def create_contracts(contracts, page_size=BATCH_PAGE_SIZE):
+    """Create many contracts in one transaction, returning their ids in input order"""
+    query = """
+    INSERT INTO solar_contracts 
+    (user_id, system_id, monthly_payment, total_cost, start_date, end_date)
+    VALUES %s RETURNING id
+    """
+    fields = ('user_id', 'system_id', 'monthly_payment', 'total_cost', 'start_date', 'end_date')
+    return execute_batch_insert(query, contracts, fields, {'end_date': None}, page_size)
+
 def get_user_contracts(user_id):
     """Get all contracts for a user"""
     query = """
@@ -100,35 +271,98 @@ def get_user_contracts(user_id):
     """
     return execute_query('search', query, (user_id,))
 
+def get_user_contracts_page(user_id, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """One page of a user's contracts ordered by id.
+
+    Returns (contracts, next_cursor); next_cursor is None on the last page.
+    """
+    limit = _page_limit(limit)
+    after_id = decode_cursor(cursor, int)[0] if cursor else 0
+    query = """
+    SELECT sc.id, sc.user_id, sc.system_id, sc.monthly_payment, sc.total_cost, sc.payments_made,
+           sc.start_date, sc.end_date, sc.is_active, ss.capacity_kw, ss.components
+    FROM solar_contracts sc
+    JOIN solar_systems ss ON sc.system_id = ss.id
+    WHERE sc.user_id = %s AND sc.id > %s
+    ORDER BY sc.id
+    LIMIT %s
+    """
+    rows = execute_query('search', query, (user_id, after_id, limit + 1))
+    contracts = [dict(zip(CONTRACT_COLUMNS, row)) for row in rows[:limit]]
+    next_cursor = encode_cursor(contracts[-1]['id']) if len(rows) > limit else None
+    return contracts, next_cursor
+
 # ================== PAYMENT OPERATIONS ==================
 def record_payment(contract_id, amount, payment_method):
     """Record a payment and update contract balance"""
-    conn, cur = connect_db()
     try:
-        cur.execute("BEGIN")
-        
-        # Record payment
-        cur.execute("""
-        INSERT INTO payments (contract_id, amount, payment_method)
-        VALUES (%s, %s, %s)
-        """, (contract_id, amount, payment_method))
-        
-        # Update contract balance
-        cur.execute("""
-        UPDATE solar_contracts 
-        SET payments_made = payments_made + %s
-        WHERE id = %s
-        """, (amount, contract_id))
-        
-        conn.commit()
-        return True
+        with pooled_connection() as conn:
+            with conn.cursor() as cur:
+                # Record payment
+                cur.execute("""
+                INSERT INTO payments (contract_id, amount, payment_method)
+                VALUES (%s, %s, %s)
+                """, (contract_id, amount, payment_method))
+
+                # Update contract balance
+                cur.execute("""
+                UPDATE solar_contracts 
+                SET payments_made = payments_made + %s
+                WHERE id = %s
+                """, (amount, contract_id))
+
+                # Update the contract's balance summary
+                cur.execute(SUMMARY_UPSERT.format(values="(%s, 1, CURRENT_TIMESTAMP)"), (contract_id,))
+
+            conn.commit()
+            return True
     except Exception as e:
-        conn.rollback()
         print(f"🚨 Payment failed: {e}")
         return False
-    finally:
-        if cur: cur.close()
-        if conn: conn.close()
+
+def record_payments(payments, page_size=BATCH_PAGE_SIZE):
+    """Record many payments in one transaction, returning their ids.
+
+    `payments` yields (contract_id, amount, payment_method) tuples or dicts.
+    Contract balances are updated once per contract with the summed
+    amounts rather than once per payment. Raises on failure, leaving
+    nothing recorded.
+    """
+    fields = ('contract_id', 'amount', 'payment_method')
+    ids = []
+    totals = {}
+    counts = {}
+    with pooled_connection() as conn:
+        with conn.cursor() as cur:
+            try:
+                for batch in _batches(payments, fields, {'payment_method': None}, page_size):
+                    result = execute_values(cur, """
+                    INSERT INTO payments (contract_id, amount, payment_method)
+                    VALUES %s RETURNING id
+                    """, batch, page_size=page_size, fetch=True)
+                    ids.extend(r[0] for r in result)
+                    for contract_id, amount, _ in batch:
+                        totals[contract_id] = totals.get(contract_id, Decimal(0)) + Decimal(str(amount))
+                        counts[contract_id] = counts.get(contract_id, 0) + 1
+
+                if totals:
+                    execute_values(cur, """
+                    UPDATE solar_contracts sc
+                    SET payments_made = sc.payments_made + v.total
+                    FROM (VALUES %s) AS v (contract_id, total)
+                    WHERE sc.id = v.contract_id
+                    """, list(totals.items()), template="(%s::integer, %s::numeric)",
+                        page_size=page_size)
+                    execute_values(cur, SUMMARY_UPSERT.format(values="%s"), list(counts.items()),
+                                   template="(%s::integer, %s::integer, CURRENT_TIMESTAMP)",
+                                   page_size=page_size)
+
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                print(f"🚨 Batch payment failed: {e}")
+                raise
+    return ids
 
 def get_payment_history(contract_id):
     """Get payment history for a contract"""
@@ -140,64 +374,92 @@ def get_payment_history(contract_id):
     """
     return execute_query('search', query, (contract_id,))
 
-# Initialize database tables when module loads
-def initialize_db():
-    conn, cur = connect_db()
-    try:
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id SERIAL PRIMARY KEY,
-            email VARCHAR(255) UNIQUE NOT NULL,
-            password_hash VARCHAR(255) NOT NULL,
-            full_name VARCHAR(100),
-            phone VARCHAR(20),
-            is_installer BOOLEAN DEFAULT FALSE
-        )""")
-        
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS solar_systems (
-            id SERIAL PRIMARY KEY,
-            installer_id INTEGER REFERENCES users(id),
-            capacity_kw DECIMAL(5,2) NOT NULL,
-            components TEXT,
-            installation_date DATE
-        )""")
-        
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS solar_contracts (
-            id SERIAL PRIMARY KEY,
-            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-            system_id INTEGER REFERENCES solar_systems(id),
-            monthly_payment DECIMAL(10,2) NOT NULL,
-            total_cost DECIMAL(10,2) NOT NULL,
-            payments_made DECIMAL(10,2) DEFAULT 0.0,
-            start_date DATE NOT NULL,
-            end_date DATE,
-            is_active BOOLEAN DEFAULT TRUE,
-            CONSTRAINT valid_payment CHECK (monthly_payment > 0 AND total_cost > monthly_payment)
-        )""")
-        
-        cur.execute("""
-        CREATE TABLE IF NOT EXISTS payments (
-            id SERIAL PRIMARY KEY,
-            contract_id INTEGER REFERENCES solar_contracts(id) ON DELETE CASCADE,
-            amount DECIMAL(10,2) NOT NULL,
-            payment_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            payment_method VARCHAR(50)
-        )""")
-        
-        conn.commit()
-        print("✅ Database tables initialized")
-    except Exception as e:
-        conn.rollback()
-        print(f"🚨 Database initialization failed: {e}")
-        raise
-    finally:
-        if cur: cur.close()
-        if conn: conn.close()
+def get_payment_history_page(contract_id, limit=DEFAULT_PAGE_SIZE, cursor=None, user_id=None):
+    """One page of a contract's payments, newest first.
+
+    Pages are keyed on (payment_date, id) so each page is an index range
+    scan however many payments the contract has. When `user_id` is given
+    only payments on that user's contract are returned. Returns
+    (payments, next_cursor); next_cursor is None on the last page.
+    """
+    limit = _page_limit(limit)
+    conditions = ["p.contract_id = %s"]
+    params = [contract_id]
+    if user_id is not None:
+        conditions.append("sc.user_id = %s")
+        params.append(user_id)
+    if cursor:
+        payment_date, payment_id = decode_cursor(cursor, str, int)
+        try:
+            payment_date = datetime.fromisoformat(payment_date)
+        except ValueError:
+            raise ValueError("Invalid pagination cursor")
+        conditions.append("(p.payment_date, p.id) < (%s, %s)")
+        params.extend([payment_date, payment_id])
 
-# Initialize when imported
-initialize_db()
+    query = f"""
+    SELECT p.id, p.amount, p.payment_date, p.payment_method
+    FROM payments p
+    JOIN solar_contracts sc ON sc.id = p.contract_id
+    WHERE {' AND '.join(conditions)}
+    ORDER BY p.payment_date DESC, p.id DESC
+    LIMIT %s
+    """
+    params.append(limit + 1)
+    rows = execute_query('search', query, tuple(params))
+    payments = [dict(zip(PAYMENT_COLUMNS, row)) for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(payments[-1]['payment_date'], payments[-1]['id'])
+    return payments, next_cursor
+
+def get_contract_summaries(contract_ids):
+    """Balance summaries (outstanding, payments remaining, arrears) for many contracts in one query"""
+    contract_ids = [int(c) for c in contract_ids]
+    if not contract_ids:
+        return []
+    query = SUMMARY_SELECT + "WHERE sc.id = ANY(%s) ORDER BY sc.id"
+    rows = execute_query('search', query, (contract_ids,))
+    return [dict(zip(SUMMARY_COLUMNS, row)) for row in rows]
+
+def get_portfolio_summary(user_id=None):
+    """Totals across all contracts (or one user's), read from the per-contract summaries"""
+    query = f"""
+    SELECT COUNT(*), COALESCE(SUM(outstanding_balance), 0), COALESCE(SUM(arrears), 0),
+           COUNT(*) FILTER (WHERE arrears > 0), COALESCE(SUM(payment_count), 0)
+    FROM ({SUMMARY_SELECT} {"WHERE sc.user_id = %s" if user_id is not None else ""}) summaries
+    """
+    row = execute_query('search', query, (user_id,) if user_id is not None else None)[0]
+    columns = ['contracts', 'outstanding_balance', 'arrears', 'contracts_in_arrears', 'payment_count']
+    return dict(zip(columns, row))
+
+# ================== EXPORTS ==================
+EXPORT_QUERIES = {
+    'contracts': (
+        ['id', 'user_id', 'system_id', 'monthly_payment', 'total_cost', 'payments_made',
+         'start_date', 'end_date', 'is_active'],
+        """
+        SELECT id, user_id, system_id, monthly_payment, total_cost, payments_made,
+               start_date, end_date, is_active
+        FROM solar_contracts ORDER BY id
+        """,
+    ),
+    'payments': (
+        ['id', 'contract_id', 'amount', 'payment_date', 'payment_method'],
+        "SELECT id, contract_id, amount, payment_date, payment_method FROM payments ORDER BY id",
+    ),
+}
+
+def stream_export(table, itersize=STREAM_ITERSIZE):
+    """Return (columns, row generator) for a full-table export of contracts or payments"""
+    if table not in EXPORT_QUERIES:
+        raise ValueError(f"Unknown export table: {table}")
+    columns, query = EXPORT_QUERIES[table]
+    return columns, stream_query(query, itersize=itersize)
+
+def initialize_db():
+    """Bring the schema up to date; deploys should run migrations.py instead"""
+    migrate()
 
 # Temporarily add this test to support.py
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+import pytest
+
+import area_catalogue
+from area_catalogue import AreaCatalogue
+
+AREAS = [
+    {"id": "durban-1", "name": "Durban North", "region": "eThekwini"},
+    {"id": "durban-2", "name": "Durban", "region": "eThekwini"},
+    {"id": "umhlanga", "name": "Umhlanga Rocks", "region": "eThekwini"},
+    {"id": "north-beach", "name": "North Beach", "region": "eThekwini"},
+    {"id": "sandton", "name": "Sandton", "region": "Johannesburg"},
+]
+
+
+@pytest.fixture
+def catalogue():
+    catalogue = AreaCatalogue()
+    catalogue.add(AREAS)
+    return catalogue
+
+
+def ids(results):
+    return [area["id"] for _, area in results]
+
+
+def test_exact_then_prefix_then_word_prefix(catalogue):
+    results = catalogue.search("durban")
+    assert ids(results) == ["durban-2", "durban-1"]
+    assert [score for score, _ in results] == [1.0, 0.9]
+    assert ids(catalogue.search("north")) == ["north-beach", "durban-1"]
+
+
+def test_every_query_word_must_prefix_a_name_word(catalogue):
+    assert ids(catalogue.search("dur nor")) == ["durban-1"]
+    assert ids(catalogue.search("Rocks, umhl")) == ["umhlanga"]
+
+
+def test_misspellings_fall_back_to_trigrams(catalogue):
+    results = catalogue.search("sandtn")
+    assert ids(results)[0] == "sandton"
+    assert results[0][0] < 0.8
+
+
+def test_no_match_limit_and_empty_query(catalogue):
+    assert catalogue.search("zzzz") == []
+    assert catalogue.search("   ") == []
+    assert len(catalogue.search("durban", limit=1)) == 1
+
+
+def test_add_skips_duplicates_and_updates_region(catalogue):
+    assert catalogue.add([{"id": "sandton", "name": "Sandton", "region": "Gauteng"},
+                          {"id": "", "name": "No id"}]) == 0
+    assert len(catalogue) == len(AREAS)
+    assert catalogue.get("sandton") == {"id": "sandton", "name": "Sandton", "region": "Gauteng"}
+
+
+def test_search_areas_asks_upstream_only_for_weak_matches(monkeypatch, catalogue):
+    monkeypatch.setattr(area_catalogue, "catalogue", catalogue)
+    asked = []
+
+    def upstream(text):
+        asked.append(text)
+        return [{"id": "ballito", "name": "Ballito", "region": "KwaDukuza"}]
+
+    assert [a["id"] for a in area_catalogue.search_areas("durban", fetch_upstream=upstream)][0] == "durban-2"
+    assert asked == []
+    assert [a["id"] for a in area_catalogue.search_areas("ballito", fetch_upstream=upstream)] == ["ballito"]
+    assert asked == ["ballito"]
+    # Now catalogued, so the next search stays local
+    area_catalogue.search_areas("ballito", fetch_upstream=upstream)
+    assert asked == ["ballito"]
+
+
+def test_search_areas_survives_upstream_failure(monkeypatch, catalogue):
+    monkeypatch.setattr(area_catalogue, "catalogue", catalogue)
+
+    def upstream(text):
+        raise RuntimeError("quota used up")
+
+    assert area_catalogue.search_areas("nowhere", fetch_upstream=upstream) == []
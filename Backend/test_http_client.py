@@ -0,0 +1,140 @@
+import io
+import time
+
+import pytest
+import requests
+
+import http_client
+from http_client import CircuitBreaker, CircuitOpenError, HttpClient, LatencyHistogram
+
+URL = "http://upstream.test/resource"
+
+
+def response(status):
+    r = requests.Response()
+    r.status_code = status
+    r.raw = io.BytesIO(b"")
+    return r
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(HttpClient, "_backoff", staticmethod(lambda attempt, retry_after=None: 0))
+    return HttpClient()
+
+
+def fake_session(client, outcomes):
+    """Make the host's session return/raise `outcomes` in turn; returns the call list"""
+    calls = []
+    outcomes = iter(outcomes)
+
+    def request(method, url, **kwargs):
+        calls.append((method, url))
+        outcome = next(outcomes)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return response(outcome)
+
+    client._host(URL)[1].session.request = request
+    return calls
+
+
+def test_breaker_opens_after_threshold_and_fails_fast():
+    breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0.01)
+    breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # only one trial at a time
+
+
+def test_successful_trial_closes_and_failed_trial_reopens():
+    breaker = CircuitBreaker(threshold=3, reset_timeout=0.01)
+    for _ in range(3):
+        breaker.record_failure()
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    time.sleep(0.02)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_retries_retryable_statuses_then_returns(client):
+    calls = fake_session(client, [503, 502, 200])
+    assert client.get(URL).status_code == 200
+    assert len(calls) == 3
+    assert client.stats()["upstream.test"]["retries"] == 2
+
+
+def test_returns_last_response_when_retries_run_out(client):
+    calls = fake_session(client, [429, 429])
+    assert client.get(URL, retries=1).status_code == 429
+    assert len(calls) == 2
+
+
+def test_retries_zero_makes_a_single_attempt(client):
+    calls = fake_session(client, [429])
+    assert client.get(URL, retries=0).status_code == 429
+    assert len(calls) == 1
+
+
+def test_post_is_not_retried_by_default(client):
+    calls = fake_session(client, [503])
+    assert client.post(URL).status_code == 503
+    assert len(calls) == 1
+
+
+def test_connection_errors_are_retried_and_reraised(client):
+    calls = fake_session(client, [requests.ConnectionError("refused")] * 3)
+    with pytest.raises(requests.ConnectionError):
+        client.get(URL)
+    assert len(calls) == 3
+    assert client.stats()["upstream.test"]["errors"] == 3
+
+
+def test_open_circuit_rejects_without_calling(client):
+    calls = fake_session(client, [])
+    client._host(URL)[1].breaker.opened_at = time.monotonic()
+    with pytest.raises(CircuitOpenError):
+        client.get(URL)
+    assert calls == []
+
+
+def test_any_failed_trial_releases_half_open(client):
+    breaker = client._host(URL)[1].breaker
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout
+    fake_session(client, [requests.exceptions.ChunkedEncodingError("cut off")])
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        client.get(URL)
+    assert breaker.state == "open"
+    assert not breaker._trial_in_flight
+
+
+def test_histogram_quantiles_use_bucket_bounds():
+    histogram = LatencyHistogram(buckets=(10, 100, float("inf")))
+    for seconds in (0.005, 0.005, 0.05, 0.5):
+        histogram.observe(seconds)
+    snapshot = histogram.snapshot()
+    assert snapshot["count"] == 4
+    assert snapshot["p50_ms"] == 10
+    assert snapshot["p95_ms"] == float("inf")
+    assert snapshot["buckets"] == {"10": 2, "100": 1, "+Inf": 1}
+
+
+def test_module_level_helpers_share_one_client():
+    assert http_client.get.__self__ is http_client.client
+    assert http_client.stats.__self__ is http_client.client
@@ -0,0 +1,41 @@
+import pytest
+
+from chat_interface import EnhancedChatbot
+from intent_classifier import TfidfIntentClassifier, make_classifier
+
+TABLE = {
+    "billing": ["pay my bill", "invoice", "payment"],
+    "outage": ["power cut", "no electricity", "blackout"],
+}
+
+
+def test_known_query_maps_to_its_intent():
+    classifier = TfidfIntentClassifier(TABLE)
+    result = classifier.classify("How do I pay my bill?", ["billing", "outage"])
+    assert result["labels"][0] == "billing"
+    assert result["scores"][0] >= classifier.low_confidence
+    assert sum(result["scores"]) == pytest.approx(1.0)
+
+
+def test_off_topic_query_is_low_confidence():
+    classifier = TfidfIntentClassifier(EnhancedChatbot.label_keywords)
+    result = classifier.classify("what is the capital of France", EnhancedChatbot.candidate_labels)
+    assert result["scores"][0] < classifier.low_confidence
+
+
+def test_low_confidence_reply_is_qualified():
+    chatbot = EnhancedChatbot()
+    confident = chatbot.chat("How do I pay my bill?")
+    unsure = chatbot.chat("what is the capital of France")
+    assert "feel free to ask" not in confident
+    assert "feel free to ask" in unsure
+
+
+def test_unknown_labels_score_zero():
+    result = TfidfIntentClassifier(TABLE).classify("blackout again", ["outage", "weather"])
+    assert dict(zip(result["labels"], result["scores"]))["weather"] == 0.0
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        make_classifier("bert", TABLE, None)
@@ -0,0 +1,51 @@
+import random
+
+from intent_matcher import IntentMatcher
+
+
+def naive_match(table, query):
+    query = query.lower()
+    for intent, keywords in table.items():
+        if any(keyword in query for keyword in keywords):
+            return intent
+    return None
+
+
+def test_overlapping_keywords_are_all_found():
+    matcher = IntentMatcher({"a": ["he", "she"], "b": ["his", "hers"]})
+    found = {(m.keyword, m.start, m.end) for m in matcher.find_all("ushers")}
+    assert found == {("she", 1, 4), ("he", 2, 4), ("hers", 2, 6)}
+
+
+def test_table_order_wins_over_position():
+    matcher = IntentMatcher({"billing": ["bill"], "error": ["error"]})
+    assert matcher.match("error on my bill") == "billing"
+    assert matcher.matched_intents("error on my bill") == ["billing", "error"]
+
+
+def test_matching_ignores_case():
+    assert IntentMatcher({"greet": ["Hello"]}).match("HELLO there") == "greet"
+
+
+def test_whole_words():
+    table = {"greeting": ["hi"], "thanks": ["thanks"]}
+    assert IntentMatcher(table).match("this") == "greeting"
+    assert IntentMatcher(table, whole_words=True).match("this") is None
+    assert IntentMatcher(table, whole_words=True).match("oh, hi!") == "greeting"
+    assert IntentMatcher(table, whole_words=True).match("thanks.") == "thanks"
+
+
+def test_no_match_and_empty_keywords():
+    matcher = IntentMatcher({"empty": [""], "status": ["status"]})
+    assert matcher.match("nothing here") is None
+    assert matcher.match("") is None
+    assert matcher.match("system status") == "status"
+
+
+def test_agrees_with_substring_loop():
+    rng = random.Random(7)
+    word = lambda: "".join(rng.choice("abcde") for _ in range(rng.randint(1, 4)))
+    for _ in range(200):
+        table = {f"intent_{i}": [word() for _ in range(rng.randint(1, 3))] for i in range(rng.randint(1, 6))}
+        query = " ".join(word() for _ in range(rng.randint(0, 5)))
+        assert IntentMatcher(table).match(query) == naive_match(table, query), (table, query)
@@ -0,0 +1,61 @@
+import threading
+
+import pytest
+
+from micro_batcher import MicroBatcher
+
+
+def test_concurrent_items_share_batches_and_keep_order():
+    batches = []
+    release = threading.Event()
+
+    def double(items):
+        release.wait(1)
+        batches.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch_size=4, max_wait=0.2)
+    futures = [batcher.submit(i) for i in range(10)]
+    release.set()
+    assert [f.result(timeout=2) for f in futures] == [i * 2 for i in range(10)]
+    assert all(len(batch) <= 4 for batch in batches)
+    assert sum(len(batch) for batch in batches) == 10
+    assert len(batches) < 10
+    assert batcher.stats()["items"] == 10
+
+
+def test_single_item_is_sent_after_max_wait():
+    batcher = MicroBatcher(lambda items: [len(items)], max_batch_size=8, max_wait=0.01)
+    assert batcher.submit("only").result(timeout=1) == 1
+
+
+def test_batch_error_reaches_every_caller():
+    def fail(items):
+        raise RuntimeError("model down")
+
+    batcher = MicroBatcher(fail, max_batch_size=4, max_wait=0.05)
+    futures = [batcher.submit(i) for i in range(3)]
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model down"):
+            future.result(timeout=1)
+
+
+def test_wrong_number_of_results_is_an_error():
+    batcher = MicroBatcher(lambda items: [], max_batch_size=4, max_wait=0.01)
+    with pytest.raises(RuntimeError, match="0 results for 1 items"):
+        batcher.submit("x").result(timeout=1)
+
+
+def test_worker_survives_a_failed_batch():
+    calls = []
+
+    def flaky(items):
+        calls.append(items)
+        if len(calls) == 1:
+            raise ValueError("first batch fails")
+        return items
+
+    batcher = MicroBatcher(flaky, max_batch_size=1, max_wait=0)
+    with pytest.raises(ValueError):
+        batcher.submit("a").result(timeout=1)
+    assert batcher.submit("b").result(timeout=1) == "b"
@@ -0,0 +1,100 @@
+import random
+from datetime import datetime, timezone
+
+from outage_index import AreaTimeline, OutageIndex, to_timestamp
+
+
+def event(start, end, note=""):
+    return {"start": start, "end": end, "note": note}
+
+
+# A long outage overlapping two short ones, plus a later separate one
+EVENTS = [
+    event(100, 120, "short-b"),
+    event(10, 200, "long"),
+    event(50, 60, "short-a"),
+    event(300, 310, "later"),
+]
+
+
+class FakeCache:
+    def __init__(self, payloads):
+        self.payloads = payloads
+
+    def peek(self, key):
+        return (self.payloads[key], 0, True) if key in self.payloads else None
+
+
+def notes(events):
+    return [e["note"] for e in events]
+
+
+def test_active_finds_every_covering_event():
+    timeline = AreaTimeline(EVENTS)
+    assert notes(timeline.active(55)) == ["long", "short-a"]
+    assert notes(timeline.active(150)) == ["long"]
+    assert timeline.active(250) == []
+
+
+def test_intervals_are_half_open():
+    timeline = AreaTimeline(EVENTS)
+    assert timeline.is_shedding(10)
+    assert timeline.is_shedding(199)
+    assert not timeline.is_shedding(200)
+    assert not timeline.is_shedding(5)
+
+
+def test_between_returns_overlapping_events_in_start_order():
+    timeline = AreaTimeline(EVENTS)
+    assert notes(timeline.between(110, 305)) == ["long", "short-b", "later"]
+    assert notes(timeline.between(200, 300)) == []
+    assert notes(timeline.between(0, 11)) == ["long"]
+
+
+def test_next_event():
+    timeline = AreaTimeline(EVENTS)
+    assert timeline.next_event(61)["note"] == "short-b"
+    assert timeline.next_event(300)["note"] == "later"
+    assert timeline.next_event(301) is None
+
+
+def test_agrees_with_brute_force():
+    rng = random.Random(3)
+    for _ in range(100):
+        events = []
+        for i in range(rng.randint(0, 12)):
+            start = rng.randint(0, 100)
+            events.append(event(start, start + rng.randint(1, 40), str(i)))
+        timeline = AreaTimeline(events)
+        for _ in range(20):
+            a = rng.randint(-5, 150)
+            b = a + rng.randint(1, 30)
+            covering = {e["note"] for e in events if e["start"] <= a < e["end"]}
+            overlapping = {e["note"] for e in events if e["start"] < b and e["end"] > a}
+            assert set(notes(timeline.active(a))) == covering
+            assert timeline.is_shedding(a) == bool(covering)
+            assert set(notes(timeline.between(a, b))) == overlapping
+
+
+def test_uncached_area_is_unknown_not_clear():
+    index = OutageIndex(FakeCache({"known": {"events": []}}))
+    status = index.status_many(["known", "cold"], at=0)
+    assert status["known"] == {"known": True, "shedding": False, "next_event": None}
+    assert status["cold"] == {"known": False, "shedding": None, "next_event": None}
+    assert index.events_between("cold", 0, 10) is None
+    assert index.is_shedding("cold") is None
+
+
+def test_timeline_is_rebuilt_only_when_payload_changes():
+    cache = FakeCache({"a": {"events": EVENTS}})
+    index = OutageIndex(cache)
+    first = index.timeline("a")
+    assert index.timeline("a") is first
+    cache.payloads["a"] = {"events": EVENTS[:1]}
+    assert len(index.timeline("a")) == 1
+
+
+def test_naive_times_are_sast():
+    assert to_timestamp("2024-06-01T10:00:00") == to_timestamp("2024-06-01T08:00:00Z")
+    assert to_timestamp(datetime(2024, 6, 1, 10)) == datetime(2024, 6, 1, 8, tzinfo=timezone.utc).timestamp()
+    assert to_timestamp("2024-06-01T10:00:00+00:00") == datetime(2024, 6, 1, 10, tzinfo=timezone.utc).timestamp()
@@ -0,0 +1,39 @@
+import base64
+import json
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("psycopg2")
+
+from support import decode_cursor, encode_cursor, get_payment_history_page, get_user_contracts_page
+
+
+def raw_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def test_round_trip():
+    assert decode_cursor(encode_cursor(42), int) == [42]
+    paid_at = datetime(2024, 3, 1, 9, 30, 15, 123456)
+    payment_date, payment_id = decode_cursor(encode_cursor(paid_at, 7), str, int)
+    assert datetime.fromisoformat(payment_date) == paid_at
+    assert payment_id == 7
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!", raw_cursor({"id": 1}), raw_cursor([]), raw_cursor([None]),
+    raw_cursor(["1"]), raw_cursor([True]), raw_cursor([1.5]), raw_cursor([1, 2]),
+])
+def test_contract_page_rejects_bad_cursors(cursor):
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        get_user_contracts_page(1, cursor=cursor)
+
+
+@pytest.mark.parametrize("cursor", [
+    raw_cursor([]), raw_cursor(["2024-01-01"]), raw_cursor(["yesterday", 1]),
+    raw_cursor([20240101, 1]), raw_cursor(["2024-01-01", None]), raw_cursor(["2024-01-01", "1"]),
+])
+def test_payment_page_rejects_bad_cursors(cursor):
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        get_payment_history_page(1, cursor=cursor)
@@ -0,0 +1,172 @@
+import threading
+import time
+
+import pytest
+
+from ttl_cache import RefreshingCache, TTLCache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_entries_expire_after_ttl():
+    cache = TTLCache(maxsize=10, ttl=0.02)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=60)
+    assert cache.get("a") == 1
+    time.sleep(0.03)
+    assert cache.get("a", "missing") == "missing"
+    assert cache.get("b") == 2
+    assert [key for key, _ in cache.items()] == ["b"]
+
+
+def test_falsy_values_are_hits():
+    cache = TTLCache()
+    cache.set("zero", 0)
+    assert cache.get("zero", "missing") == 0
+
+
+def test_delete_and_delete_where():
+    cache = TTLCache()
+    for key, value in {"a": 1, "b": 2, "c": 3}.items():
+        cache.set(key, value)
+    cache.delete("a")
+    cache.delete("unknown")
+    cache.delete_where(lambda value: value % 2 == 0)
+    assert [key for key, _ in cache.items()] == ["c"]
+
+
+def test_stats_count_hits_and_misses():
+    cache = TTLCache(maxsize=5)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+class CountingLoader:
+    def __init__(self, delay=0.0, fail=False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, key):
+        with self._lock:
+            self.calls.append(key)
+            version = len(self.calls)
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"cannot load {key}")
+        return f"{key}-v{version}"
+
+
+def test_concurrent_misses_share_one_load():
+    loader = CountingLoader(delay=0.05)
+    cache = RefreshingCache(loader, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get("k"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["k-v1"] * 8
+    assert loader.calls == ["k"]
+    assert cache.stats()["coalesced"] == 7
+
+
+def test_stale_value_is_served_while_refreshing():
+    loader = CountingLoader(delay=0.05)
+    cache = RefreshingCache(loader, ttl=0.02, stale_ttl=60)
+    assert cache.get("k") == "k-v1"
+    time.sleep(0.03)
+    started = time.monotonic()
+    assert cache.get("k") == "k-v1"  # stale, returned without waiting
+    assert time.monotonic() - started < 0.04
+    deadline = time.monotonic() + 1
+    while cache.peek("k")[0] != "k-v2" and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert cache.peek("k")[0] == "k-v2"  # replaced by the background refresh
+    assert loader.calls == ["k", "k"]
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_expired_past_stale_ttl_loads_again():
+    loader = CountingLoader()
+    cache = RefreshingCache(loader, ttl=0.01, stale_ttl=0.01)
+    cache.get("k")
+    time.sleep(0.03)
+    assert cache.peek("k") is None
+    assert cache.get("k") == "k-v2"
+
+
+def test_load_errors_propagate_and_are_not_cached():
+    loader = CountingLoader(fail=True)
+    cache = RefreshingCache(loader, ttl=60)
+    with pytest.raises(RuntimeError):
+        cache.get("k")
+    loader.fail = False
+    assert cache.get("k") == "k-v2"
+    assert cache.stats()["load_errors"] == 1
+
+
+def test_callable_ttl_and_peek_freshness():
+    cache = RefreshingCache(CountingLoader(), ttl=lambda: 0.02, stale_ttl=60)
+    cache.get("k")
+    assert cache.peek("k")[2] is True
+    time.sleep(0.03)
+    value, _, fresh = cache.peek("k")
+    assert (value, fresh) == ("k-v1", False)
+
+
+def test_get_many_loads_cold_keys_in_one_batch():
+    cache = RefreshingCache(CountingLoader(), ttl=60)
+    cache.put("warm", "cached")
+    batches = []
+
+    def batch_loader(keys):
+        batches.append(keys)
+        return {key: f"{key}-batch" for key in keys if key != "gone"}
+
+    values, errors = cache.get_many(["warm", "a", "b", "gone", "a"], batch_loader)
+    assert batches == [["a", "b", "gone"]]
+    assert values == {"warm": "cached", "a": "a-batch", "b": "b-batch"}
+    assert isinstance(errors["gone"], KeyError)
+    assert cache.get("a") == "a-batch"
+
+
+def test_get_many_reports_a_failed_batch_per_key():
+    cache = RefreshingCache(CountingLoader(), ttl=60)
+
+    def batch_loader(keys):
+        raise RuntimeError("upstream down")
+
+    values, errors = cache.get_many(["a", "b"], batch_loader)
+    assert values == {}
+    assert set(errors) == {"a", "b"}
+    assert all(isinstance(e, RuntimeError) for e in errors.values())
+
+
+def test_refresh_reloads_fresh_entries_and_joins_inflight_loads():
+    loader = CountingLoader(delay=0.05)
+    cache = RefreshingCache(loader, ttl=60)
+    assert cache.get("k") == "k-v1"
+    assert cache.refresh("k") == "k-v2"
+
+    results = []
+    reader = threading.Thread(target=lambda: results.append(cache.refresh("k")))
+    reader.start()
+    time.sleep(0.01)
+    assert cache.refresh("k") == "k-v3"
+    reader.join()
+    assert results == ["k-v3"]
+    assert len(loader.calls) == 3
@@ -0,0 +1,247 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL.
+
+    `get` returns `default` for both missing and expired keys, so callers
+    that need to cache "not found" should store their own sentinel.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_where(self, predicate):
+        """Drop every entry whose value matches `predicate`"""
+        with self._lock:
+            for key in [k for k, (value, _) in self._data.items() if predicate(value)]:
+                del self._data[key]
+
+    def items(self):
+        """Unexpired (key, value) pairs, least recently used first"""
+        now = time.monotonic()
+        with self._lock:
+            return [(key, value) for key, (value, expires) in self._data.items() if expires > now]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+class RefreshingCache:
+    """Loader-backed cache with request coalescing and stale-while-revalidate.
+
+    Concurrent misses for the same key share a single `loader(key)` call.
+    Once an entry's TTL passes it is still served for `stale_ttl` seconds
+    while one background refresh replaces it. `ttl` may be a number of
+    seconds or a callable returning one, e.g. to align expiry with an
+    upstream update schedule.
+    """
+
+    def __init__(self, loader, ttl, stale_ttl=0.0, maxsize=1024, refresh_workers=4,
+                 load_timeout=30.0):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self.load_timeout = load_timeout
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers,
+                                             thread_name_prefix='cache-refresh')
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.load_errors = 0
+
+    def _ttl(self):
+        return self.ttl() if callable(self.ttl) else self.ttl
+
+    def _lookup(self, key):
+        """Return ("value", v), ("wait", future) or ("lead", future); caller holds the lock"""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, fresh_until, stale_until, _ = entry
+            if now < fresh_until:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return "value", value
+            if now < stale_until:
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self._inflight[key] = Future()
+                    self._refresher.submit(self._load, key, self._inflight[key])
+                return "value", value
+        self.misses += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return "wait", future
+        future = self._inflight[key] = Future()
+        return "lead", future
+
+    def get(self, key):
+        with self._lock:
+            state, result = self._lookup(key)
+        if state == "value":
+            return result
+        if state == "lead":
+            self._load(key, result)
+        return result.result(timeout=self.load_timeout)
+
+    def get_many(self, keys, batch_loader):
+        """Look up several keys, loading every cold one with a single batch call.
+
+        `batch_loader(keys)` must return {key: value}; keys it omits fail
+        with KeyError. Keys already being loaded by another caller are
+        waited on rather than fetched again. Returns (values, errors),
+        both dicts keyed by the requested keys.
+        """
+        values, errors, waiting, leading = {}, {}, {}, {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                state, result = self._lookup(key)
+                if state == "value":
+                    values[key] = result
+                else:
+                    (leading if state == "lead" else waiting)[key] = result
+
+        if leading:
+            try:
+                loaded = batch_loader(list(leading))
+            except Exception as e:
+                loaded = {}
+                batch_error = e
+            else:
+                batch_error = None
+            for key, future in leading.items():
+                if key in loaded:
+                    self.put(key, loaded[key])
+                    with self._lock:
+                        self._inflight.pop(key, None)
+                    future.set_result(loaded[key])
+                else:
+                    with self._lock:
+                        self.load_errors += 1
+                        self._inflight.pop(key, None)
+                    future.set_exception(batch_error or KeyError(key))
+
+        for key, future in {**leading, **waiting}.items():
+            try:
+                values[key] = future.result(timeout=self.load_timeout)
+            except Exception as e:
+                errors[key] = e
+        return values, errors
+
+    def refresh(self, key):
+        """Load `key` now even if cached, sharing any load already in flight"""
+        with self._lock:
+            future = self._inflight.get(key)
+            lead = future is None
+            if lead:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if lead:
+            self._load(key, future)
+        return future.result(timeout=self.load_timeout)
+
+    def _load(self, key, future):
+        try:
+            value = self.loader(key)
+        except Exception as e:
+            with self._lock:
+                self.load_errors += 1
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            return
+        self.put(key, value)
+        with self._lock:
+            self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def put(self, key, value, ttl=None):
+        """Store a value fetched elsewhere (e.g. by a prefetcher or batch call)"""
+        now = time.time()
+        fresh_until = now + (self._ttl() if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, fresh_until, fresh_until + self.stale_ttl, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def peek(self, key):
+        """Return (value, fetched_at, is_fresh) without loading, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or time.time() >= entry[2]:
+            return None
+        value, fresh_until, _, fetched_at = entry
+        return value, fetched_at, time.time() < fresh_until
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'load_errors': self.load_errors,
+                'hit_rate': ((self.hits + self.stale_hits) / lookups) if lookups else 0.0,
+            }
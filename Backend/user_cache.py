@@ -0,0 +1,62 @@
+import os
+
+from dotenv import load_dotenv
+
+from ttl_cache import TTLCache
+
+# Load environment variables
+load_dotenv()
+
+USER_CACHE_MAX_SIZE = int(os.getenv('USER_CACHE_MAX_SIZE', '10000'))
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '300'))
+# Unknown emails are remembered for less time so new sign-ups appear quickly
+USER_CACHE_NEGATIVE_TTL = float(os.getenv('USER_CACHE_NEGATIVE_TTL', '30'))
+
+# Marks an email that is known not to exist
+NOT_FOUND = object()
+
+# The cache is per process: invalidation only reaches the worker that made
+# the change, so other workers may serve a record for up to USER_CACHE_TTL.
+_by_email = TTLCache(USER_CACHE_MAX_SIZE, USER_CACHE_TTL)
+_by_id = TTLCache(USER_CACHE_MAX_SIZE, USER_CACHE_TTL)
+
+
+def normalize_email(email):
+    return email.strip().lower() if isinstance(email, str) else email
+
+
+def get_by_email(email):
+    """Cached user dict, NOT_FOUND for a cached miss, or None when unknown"""
+    user = _by_email.get(normalize_email(email))
+    if user is None or user is NOT_FOUND:
+        return user
+    return dict(user)
+
+
+def get_by_id(user_id):
+    user = _by_id.get(user_id)
+    return dict(user) if user is not None else None
+
+
+def remember(user):
+    """Cache a user row under both its email and its id"""
+    user = dict(user)
+    _by_email.set(normalize_email(user['email']), user)
+    _by_id.set(user['id'], user)
+
+
+def remember_missing(email):
+    _by_email.set(normalize_email(email), NOT_FOUND, ttl=USER_CACHE_NEGATIVE_TTL)
+
+
+def invalidate(email=None, user_id=None):
+    """Drop a user from the cache after it is created or changed"""
+    if email is not None:
+        _by_email.delete(normalize_email(email))
+    if user_id is not None:
+        _by_id.delete(user_id)
+        _by_email.delete_where(lambda user: user is not NOT_FOUND and user.get('id') == user_id)
+
+
+def stats():
+    return {'by_email': _by_email.stats(), 'by_id': _by_id.stats()}
@@ -25,9 +25,13 @@ const LoadsheddingStatus = ({ selectedArea }) => {
   const textColor = useColorModeValue('gray.700', 'gray.300');
   const cardBg = useColorModeValue('white', 'gray.700');
 
-  // Function to fetch loadshedding status
+  // Subscribe to loadshedding updates; the backend pushes a new snapshot whenever
+  // the stage or the area's events change, so no polling is needed
   useEffect(() => {
-    const fetchLoadsheddingStatus = async () => {
+    let eventSource = null;
+    let cancelled = false;
+
+    const subscribeToLoadsheddingStatus = async () => {
       setLoading(true);
       setError(null); // Clear previous errors
       let areaIdToFetch = null;
@@ -51,48 +55,53 @@ const LoadsheddingStatus = ({ selectedArea }) => {
             return; // Stop execution if no area is found
           }
         } else if (selectedArea && selectedArea.id && (typeof selectedArea.id === 'string' && selectedArea.id.trim() !== '' || typeof selectedArea.id === 'number' && selectedArea.id > 0)) {
-          areaIdToFetch = typeof selectedArea.id === 'string' ? parseInt(selectedArea.id.trim(), 10) : selectedArea.id;
-        }
-
-        let url;
-        let logMessage;
-        if (areaIdToFetch) {
-          url = `http://localhost:5000/api/loadshedding?area_id=${areaIdToFetch}`;
-          logMessage = `Attempting to fetch loadshedding status for area ID: ${areaIdToFetch} from backend...`;
-        } else {
-          url = `http://localhost:5000/api/loadshedding/national-status`;
-          logMessage = `Attempting to fetch national loadshedding status from backend...`;
+          areaIdToFetch = typeof selectedArea.id === 'string' ? selectedArea.id.trim() : selectedArea.id;
         }
-
-        console.log(logMessage);
-        const response = await fetch(url);
-
-        if (!response.ok) {
-          const errorText = await response.text(); // Get raw error text
-          console.error(`HTTP error! Status: ${response.status}, Response: ${errorText}`);
-          throw new Error(`Failed to fetch loadshedding status: ${response.status} - ${errorText}`);
-        }
-
-        const data = await response.json();
-        console.log("Successfully fetched Loadshedding Status:", data); // Debugging log
-        setLoadsheddingData(data);
       } catch (e) {
-        console.error("Error in fetchLoadsheddingStatus (frontend):", e.message); // Log the specific error message
+        console.error("Error in subscribeToLoadsheddingStatus (frontend):", e.message); // Log the specific error message
         setError(`Failed to load loadshedding status: ${e.message}. Please check backend or API.`);
-      } finally {
         setLoading(false);
+        return;
       }
+
+      if (cancelled) return;
+
+      const url = areaIdToFetch
+        ? `http://localhost:5000/api/loadshedding/stream?areaId=${encodeURIComponent(areaIdToFetch)}`
+        : `http://localhost:5000/api/loadshedding/stream`;
+      console.log(`Subscribing to loadshedding updates at ${url}`);
+      eventSource = new EventSource(url);
+
+      eventSource.addEventListener('update', (event) => {
+        const update = JSON.parse(event.data);
+        console.log("Received Loadshedding Status update:", update); // Debugging log
+        setLoadsheddingData({
+          status: { stage: update.stage == null ? null : update.stage === 0 ? 'No Load-shedding' : `Stage ${update.stage}` },
+          events: update.events || [],
+        });
+        setError(null);
+        setLoading(false);
+      });
+
+      // EventSource reconnects by itself; only surface the error until it does
+      eventSource.onerror = () => {
+        console.error("Loadshedding stream connection lost, reconnecting...");
+        setError("Lost connection to loadshedding updates. Reconnecting...");
+        setLoading(false);
+      };
     };
 
-    fetchLoadsheddingStatus();
+    subscribeToLoadsheddingStatus();
 
-    // Optional: Fetch status periodically (e.g., every 5 minutes)
-    const intervalId = setInterval(fetchLoadsheddingStatus, 5 * 60 * 1000); // 5 minutes
-    return () => clearInterval(intervalId); // Clear interval on component unmount
+    return () => {
+      cancelled = true;
+      if (eventSource) eventSource.close(); // Close the stream on unmount or area change
+    };
   }, [selectedArea]); // Add selectedArea to dependency array
 
   const getStageColor = (stage) => {
     switch (stage) {
+      case 'No Load-shedding':
       case 'Stage 1': return 'green';
       case 'Stage 2': return 'yellow';
       case 'Stage 3': return 'orange';
@@ -24,12 +24,18 @@ env_path = Path(__file__).resolve().parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
 import requests
-from flask import Flask, request, jsonify, send_from_directory
+import http_client
+from flask import Flask, request, jsonify, send_from_directory, Response
 from flask_cors import CORS
 from hugging_services import HuggingFaceChatbot
+from weather_service import (AREA_COORDINATES, FORECAST_FORMATS, WeatherFetchError, forecast_cache,
+                             get_forecast, get_forecasts, get_shaped_forecast, shape_forecast, to_ndjson)
+from weather_prefetcher import prefetcher, start_prefetcher
+from solar_yield import estimate_fleet, estimate_system, fleet_summary
+from support import get_solar_systems
 import logging
 from authlib.integrations.flask_client import OAuth
-from flask_jwt_extended import JWTManager
+from flask_jwt_extended import JWTManager, jwt_required
 from app.routes.auth import auth_bp
 
 # Debug checks for environment variables
@@ -85,9 +91,10 @@ app.register_blueprint(areas_bp)
 chatbot = HuggingFaceChatbot()
 
 # Import SendGrid
-from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 
+SENDGRID_SEND_URL = "https://api.sendgrid.com/v3/mail/send"
+
 @app.route('/api/chat', methods=['POST'])
 def chat():
     try:
@@ -135,7 +142,7 @@ def test_push_notification():
 
     try:
         logging.info(f"Sending OneSignal test notification with payload: {payload}")
-        response = requests.post(notification_url, headers=headers, json=payload, timeout=10)
+        response = http_client.post(notification_url, headers=headers, json=payload, timeout=10)
         response.raise_for_status()
         logging.info(f"OneSignal test response: {response.json()}")
         return jsonify({"status": "success", "message": "Test push notification sent!", "onesignal_response": response.json()}), 200
@@ -190,31 +197,59 @@ def test_email_notification():
         html_content=html_content
     )
     try:
-        sendgrid_client = SendGridAPIClient(sendgrid_api_key)
-        response = sendgrid_client.send(message)
-        logging.info(f"SendGrid test email response: Status Code: {response.status_code}, Body: {response.body}, Headers: {response.headers}")
+        # Sent through the shared HTTP client rather than SendGridAPIClient, so
+        # SendGrid gets the same timeouts and circuit breaking as other upstreams
+        response = http_client.post(SENDGRID_SEND_URL, json=message.get(), timeout=10, headers={
+            "Authorization": f"Bearer {sendgrid_api_key}",
+            "Content-Type": "application/json"
+        })
+        logging.info(f"SendGrid test email response: Status Code: {response.status_code}, Body: {response.text}, Headers: {response.headers}")
         if response.status_code == 202:
             return jsonify({"status": "success", "message": "Test email sent successfully!"}), 200
         else:
-            return jsonify({"status": "error", "message": "Failed to send test email.", "sendgrid_response": {"status_code": response.status_code, "body": response.body.decode(), "headers": dict(response.headers)}}), response.status_code
+            return jsonify({"status": "error", "message": "Failed to send test email.", "sendgrid_response": {"status_code": response.status_code, "body": response.text, "headers": dict(response.headers)}}), response.status_code
     except Exception as e:
         logging.exception("Exception in /api/email/test")
         return jsonify({"error": str(e)}), 500
 
 
-AREA_COORDINATES = {
-    "johannesburg": {"latitude": -26.2041, "longitude": 28.0473},
-    "capetown": {"latitude": -33.9249, "longitude": 18.4241},
-    "durban": {"latitude": -29.8587, "longitude": 31.0218},
-    "pretoria": {"latitude": -25.7479, "longitude": 28.2293},
-    "bloemfontein": {"latitude": -29.0852, "longitude": 26.2159},
-    "polokwane": {"latitude": -23.9045, "longitude": 29.4688},
-    "nelspruit": {"latitude": -25.4773, "longitude": 30.9700},
-    "kimberley": {"latitude": -28.7383, "longitude": 24.7630},
-    "mafikeng": {"latitude": -25.8733, "longitude": 25.6713},
-    "gqeberha": {"latitude": -33.9611, "longitude": 25.6102},
-    "eastlondon": {"latitude": -33.0186, "longitude": 27.8942},
-}
+@app.route("/api/weather/metrics", methods=["GET"])
+@jwt_required()
+def get_weather_metrics():
+    return jsonify({
+        "prefetch": prefetcher.metrics(),
+        "cache": forecast_cache.stats()
+    })
+
+@app.route("/api/health/upstreams", methods=["GET"])
+@jwt_required()
+def get_upstream_health():
+    """Per-host request counts, circuit state and latency histograms"""
+    return jsonify(http_client.stats())
+
+@app.route("/api/weather/batch", methods=["GET"])
+def get_weather_batch():
+    """Forecasts for several areas in one call: /api/weather/batch?areaIds=durban,capetown"""
+    area_ids = [a.strip().lower() for a in request.args.get('areaIds', '').split(',') if a.strip()]
+    if not area_ids:
+        return jsonify({"error": "areaIds is required"}), 400
+    unknown = [a for a in area_ids if a not in AREA_COORDINATES]
+    if unknown:
+        return jsonify({"error": "Unknown areaIds: " + ", ".join(unknown) + ". Supported areaIds are: " + ", ".join(AREA_COORDINATES.keys())}), 400
+
+    response_format = request.args.get('format', 'rows')
+    if response_format not in ("rows", "columnar"):
+        return jsonify({"error": "format must be rows or columnar"}), 400
+
+    try:
+        forecasts, errors = get_forecasts(area_ids)
+        return jsonify({
+            "forecasts": {a: shape_forecast(a, data, response_format) for a, data in forecasts.items()},
+            "errors": {a: str(e) for a, e in errors.items()}
+        })
+    except Exception as e:
+        logging.exception("Exception in /api/weather/batch")
+        return jsonify({"error": str(e)}), 500
 
 @app.route("/api/weather", methods=["GET"])
 def get_weather():
@@ -223,61 +258,52 @@ def get_weather():
     if area_id not in AREA_COORDINATES:
         return jsonify({"error": "Invalid or unknown areaId. Supported areaIds are: " + ", ".join(AREA_COORDINATES.keys())}), 400
 
-    coords = AREA_COORDINATES[area_id]
-    latitude = coords["latitude"]
-    longitude = coords["longitude"]
-
-    url = (
-        f"https://api.open-meteo.com/v1/forecast?"
-        f"latitude={latitude}&longitude={longitude}&"
-        f"daily=temperature_2m_max,temperature_2m_min,sunrise,sunset,daylight_duration,sunshine_duration,uv_index_max,uv_index_clear_sky_max&"
-        f"hourly=temperature_2m,relative_humidity_2m&timezone=auto"
-    )
+    response_format = request.args.get('format', 'rows')
+    if response_format not in FORECAST_FORMATS:
+        return jsonify({"error": "format must be one of: " + ", ".join(FORECAST_FORMATS)}), 400
 
     try:
-        logging.info(f"Fetching weather from: {url}")
-        response = requests.get(url, timeout=10)
-        if response.status_code != 200:
-            logging.error(f"Weather API error: {response.status_code} {response.text}")
-            return jsonify({"error": "Failed to fetch weather"}), response.status_code
-
-        data = response.json()
-        daily = data.get("daily", {})
-        hourly = data.get("hourly", {})
-
-        forecast_daily = []
-        if 'time' in daily and len(daily['time']) > 0:
-            for i in range(min(7, len(daily.get("time", [])))):
-                forecast_daily.append({
-                    "date": daily.get("time", [""])[i],
-                    "temperature_2m_max": daily.get("temperature_2m_max", [None])[i],
-                    "temperature_2m_min": daily.get("temperature_2m_min", [None])[i],
-                    "sunshine_duration": daily.get("sunshine_duration", [None])[i],
-                    "sunrise": daily.get("sunrise", [""])[i],
-                    "sunset": daily.get("sunset", [""])[i],
-                    "uv_index_max": daily.get("uv_index_max", [None])[i],
-                    "daylight_duration": daily.get("daylight_duration", [None])[i]
-                })
-
-        forecast_hourly = []
-        if 'time' in hourly and len(hourly['time']) > 0:
-            for i in range(len(hourly.get("time", []))):
-                forecast_hourly.append({
-                    "time": hourly.get("time", [""])[i],
-                    "temperature_2m": hourly.get("temperature_2m", [None])[i],
-                    "relative_humidity_2m": hourly.get("relative_humidity_2m", [None])[i]
-                })
-
-        logging.info(f"Returning daily forecast: {forecast_daily}")
-        logging.info(f"Returning hourly forecast: {forecast_hourly}")
-        return jsonify({
-            "daily_forecast": forecast_daily,
-            "hourly_forecast": forecast_hourly
-        })
+        if response_format == "ndjson":
+            return Response(to_ndjson(get_forecast(area_id)), mimetype="application/x-ndjson")
+        return jsonify(get_shaped_forecast(area_id, response_format))
+    except WeatherFetchError as e:
+        return jsonify({"error": str(e)}), e.status_code
     except Exception as e:
         logging.exception("Exception in /api/weather")
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/solar/yield", methods=["GET"])
+def get_solar_yield():
+    """Estimated output for one system: /api/solar/yield?areaId=durban&capacityKw=5"""
+    area_id = request.args.get('areaId', '').lower()
+    if area_id not in AREA_COORDINATES:
+        return jsonify({"error": "Invalid or unknown areaId. Supported areaIds are: " + ", ".join(AREA_COORDINATES.keys())}), 400
+    try:
+        capacity_kw = float(request.args.get('capacityKw', '1'))
+    except ValueError:
+        return jsonify({"error": "capacityKw must be a number"}), 400
+    if capacity_kw <= 0:
+        return jsonify({"error": "capacityKw must be positive"}), 400
+
+    try:
+        return jsonify(estimate_system(area_id, capacity_kw))
+    except WeatherFetchError as e:
+        return jsonify({"error": str(e)}), e.status_code
+    except Exception as e:
+        logging.exception("Exception in /api/solar/yield")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/solar/yield/fleet", methods=["GET"])
+def get_fleet_yield():
+    """Daily estimates for every registered system, optionally limited with ?areaIds=a,b"""
+    area_ids = [a.strip().lower() for a in request.args.get('areaIds', '').split(',') if a.strip()]
+    try:
+        estimates, errors = estimate_fleet(get_solar_systems(area_ids or None))
+        return jsonify(fleet_summary(estimates, errors))
+    except Exception as e:
+        logging.exception("Exception in /api/solar/yield/fleet")
+        return jsonify({"error": str(e)}), 500
+
 
 
 
@@ -314,7 +340,7 @@ def send_notification():
 
     try:
         logging.info(f"Sending OneSignal notification with payload: {payload}")
-        response = requests.post(notification_url, headers=headers, json=payload, timeout=10)
+        response = http_client.post(notification_url, headers=headers, json=payload, timeout=10)
         response.raise_for_status()
         logging.info(f"OneSignal response: {response.json()}")
         return jsonify({"status": "success", "onesignal_response": response.json()}), 200
@@ -334,5 +360,7 @@ def static_proxy(path):
     return send_from_directory(app.static_folder, path)
 
 if __name__ == '__main__':
+    # Keep every area's forecast warm so /api/weather rarely waits on Open-Meteo
+    start_prefetcher()
     logger.info("Starting Flask app on port 5000")
     app.run(debug=True, port=5000)
@@ -1,6 +1,7 @@
 # daily_notifier.py
 import requests
 import os
+import http_client
 import time
 import schedule
 from dotenv import load_dotenv
@@ -22,7 +23,7 @@ def get_national_loadshedding_status_from_backend():
     """Fetches national loadshedding status from your Flask backend."""
     try:
         logger.info(f"Attempting to fetch national loadshedding status from backend: {BACKEND_URL}/api/loadshedding/national-status")
-        response = requests.get(f"{BACKEND_URL}/api/loadshedding/national-status", timeout=15) # Increased timeout
+        response = http_client.get(f"{BACKEND_URL}/api/loadshedding/national-status", timeout=15) # Increased timeout
         response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
         return response.json()
     except requests.exceptions.RequestException as e:
@@ -36,7 +37,7 @@ def send_onesignal_notification_via_backend(message_content, heading="Loadsheddi
     """Sends a OneSignal notification by calling your Flask backend endpoint."""
     try:
         logger.info(f"Attempting to send OneSignal notification via backend: {BACKEND_URL}/api/notifications/send")
-        response = requests.post(
+        response = http_client.post(
             f"{BACKEND_URL}/api/notifications/send",
             json={"message": message_content, "heading": heading},
             timeout=15 # Increased timeout
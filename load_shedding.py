@@ -1,51 +1,97 @@
-from flask import Flask, jsonify, request
+from urllib.parse import quote
+
+from flask import Flask, Response, jsonify, request, stream_with_context
 from flask_cors import CORS
-import requests
+
+from loadshedding_service import get_eskom_page, get_national_stage, stats
+from loadshedding_broadcaster import TooManySubscribersError, broadcaster
+from outage_index import outage_index
 
 app = Flask(__name__)
 CORS(app)
 
-BASE_ESKOM_URL = "http://loadshedding.eskom.co.za"
+# Upstream lookups go through loadshedding_service, so repeated requests are
+# served from its cache instead of calling Eskom each time
 
 @app.route("/api/status", methods=["GET"])
 def get_stage():
     try:
-        res = requests.get(f"{BASE_ESKOM_URL}/LoadShedding/GetStatus")
-        stage = int(res.text)
-        return jsonify({"stage": stage})
+        return jsonify({"stage": get_national_stage()})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route("/api/municipalities/<province_id>", methods=["GET"])
 def get_municipalities(province_id):
     try:
-        res = requests.get(f"{BASE_ESKOM_URL}/LoadShedding/GetMunicipalities/?Id={province_id}")
-        return jsonify(res.json())
+        return app.response_class(get_eskom_page(f"/LoadShedding/GetMunicipalities/?Id={quote(province_id)}"),
+                                  mimetype="application/json")
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route("/api/suburbs", methods=["GET"])
 def get_suburbs():
-    muni_id = request.args.get("municipality_id")
+    muni_id = request.args.get("municipality_id", "")
     search = request.args.get("search", "")
     try:
-        res = requests.get(f"{BASE_ESKOM_URL}/LoadShedding/GetSurburbData/?MunicipalityId={muni_id}&SearchText={search}")
-        return res.text, 200
+        return get_eskom_page(f"/LoadShedding/GetSurburbData/?MunicipalityId={quote(muni_id)}&SearchText={quote(search)}"), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route("/api/schedule", methods=["GET"])
 def get_schedule():
-    suburb_id = request.args.get("suburb_id")
-    stage = request.args.get("stage")
+    suburb_id = request.args.get("suburb_id", "")
+    stage = request.args.get("stage", "")
     province_id = request.args.get("province_id", "4")  # default to Gauteng
     muni_count = request.args.get("municipality_count", "10")
     try:
-        url = f"{BASE_ESKOM_URL}/LoadShedding/GetScheduleM/{suburb_id}/{stage}/{province_id}/{muni_count}"
-        res = requests.get(url)
-        return res.text, 200
+        path = "/LoadShedding/GetScheduleM/" + "/".join(quote(p, safe="") for p in (suburb_id, stage, province_id, muni_count))
+        return get_eskom_page(path), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/loadshedding/stream", methods=["GET"])
+def stream_loadshedding():
+    """Server-sent stage/event updates for ?areaId= (national stage only if omitted)"""
+    area_id = request.args.get("areaId") or None
+    try:
+        events = broadcaster.stream(area_id)
+    except TooManySubscribersError as e:
+        return jsonify({"error": str(e)}), 503, {"Retry-After": "30"}
+    return Response(stream_with_context(events), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/api/loadshedding/outages", methods=["GET"])
+def get_outage_status():
+    """Shedding now (or at ?at=) and next event for ?areaIds=a,b, from cached schedules only.
+
+    Areas without a cached schedule are reported with "known": false.
+    """
+    area_ids = [a.strip() for a in request.args.get("areaIds", "").split(",") if a.strip()]
+    if not area_ids:
+        return jsonify({"error": "areaIds is required"}), 400
+    try:
+        return jsonify(outage_index.status_many(area_ids, request.args.get("at")))
+    except ValueError as e:
+        return jsonify({"error": f"Invalid time: {e}"}), 400
+
+@app.route("/api/loadshedding/outages/<area_id>/events", methods=["GET"])
+def get_outage_events(area_id):
+    """Cached events for an area overlapping ?start= to ?end= (ISO-8601, SAST if no offset).
+
+    "known" is false (and "events" null) when the area's schedule is not cached.
+    """
+    start, end = request.args.get("start"), request.args.get("end")
+    if not start or not end:
+        return jsonify({"error": "start and end are required"}), 400
+    try:
+        events = outage_index.events_between(area_id, start, end)
+        return jsonify({"area_id": area_id, "known": events is not None, "events": events})
+    except ValueError as e:
+        return jsonify({"error": f"Invalid time: {e}"}), 400
+
+@app.route("/api/loadshedding/cache", methods=["GET"])
+def get_cache_stats():
+    return jsonify({**stats(), "stream": broadcaster.metrics()})
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
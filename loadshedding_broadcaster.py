@@ -0,0 +1,178 @@
+# loadshedding_broadcaster.py
+import os
+import json
+import queue
+import threading
+import logging
+
+from dotenv import load_dotenv
+
+from loadshedding_service import get_area_events, get_national_stage, stage_from_status
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Seconds between polls of the (cached) load-shedding sources
+LOADSHEDDING_POLL_INTERVAL = float(os.getenv("LOADSHEDDING_POLL_INTERVAL", "30"))
+# Seconds between keep-alive comments on idle streams, so proxies keep them open
+LOADSHEDDING_STREAM_KEEPALIVE = float(os.getenv("LOADSHEDDING_STREAM_KEEPALIVE", "15"))
+# Updates buffered per client; a slow client loses its oldest updates first
+LOADSHEDDING_SUBSCRIBER_QUEUE = int(os.getenv("LOADSHEDDING_SUBSCRIBER_QUEUE", "16"))
+# Open streams allowed at once. Each one holds a server worker thread for as
+# long as the client stays connected, so the server needs more threads than
+# this (e.g. gunicorn --threads) to keep serving ordinary requests
+LOADSHEDDING_MAX_SUBSCRIBERS = int(os.getenv("LOADSHEDDING_MAX_SUBSCRIBERS", "50"))
+
+NATIONAL = None  # area key for clients that only want the national stage
+
+
+class TooManySubscribersError(Exception):
+    """Raised by subscribe() when LOADSHEDDING_MAX_SUBSCRIBERS streams are open"""
+
+
+class LoadsheddingBroadcaster:
+    """Polls load-shedding sources once and fans changes out to subscribers.
+
+    A single daemon thread reads the national stage and the events of every
+    area that has at least one subscriber, so upstream work grows with the
+    number of distinct areas, not clients. Each subscriber owns a bounded
+    queue that receives a snapshot whenever its area's stage or events
+    change. Stages are real stage numbers (0 = no load-shedding); if Eskom
+    cannot be read, the last known stage is kept.
+    """
+
+    def __init__(self, interval=LOADSHEDDING_POLL_INTERVAL, queue_size=LOADSHEDDING_SUBSCRIBER_QUEUE,
+                 max_subscribers=LOADSHEDDING_MAX_SUBSCRIBERS):
+        self.interval = interval
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._stage = None
+        self._subscribers = {}
+        self._snapshots = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self.polls = 0
+        self.published = 0
+        self.dropped = 0
+        self.rejected = 0
+
+    def subscribe(self, area_id=NATIONAL):
+        """Register a client queue; it immediately gets the latest known snapshot"""
+        q = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if sum(len(s) for s in self._subscribers.values()) >= self.max_subscribers:
+                self.rejected += 1
+                raise TooManySubscribersError(f"{self.max_subscribers} load-shedding streams already open")
+            self._subscribers.setdefault(area_id, set()).add(q)
+            snapshot = self._snapshots.get(area_id)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="loadshedding-broadcaster", daemon=True)
+                self._thread.start()
+        if snapshot is not None:
+            q.put_nowait(snapshot)
+        else:
+            self._wake.set()  # poll the new area now rather than at the next interval
+        return q
+
+    def unsubscribe(self, area_id, q):
+        with self._lock:
+            subscribers = self._subscribers.get(area_id)
+            if subscribers is None:
+                return
+            subscribers.discard(q)
+            if not subscribers:
+                del self._subscribers[area_id]
+                self._snapshots.pop(area_id, None)
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning(f"Load-shedding poll failed: {e}")
+            self._wake.wait(self.interval)
+
+    def poll(self):
+        """Read every subscribed area once and publish those that changed"""
+        with self._lock:
+            area_ids = list(self._subscribers)
+        if not area_ids:
+            return
+        try:
+            self._stage = stage_from_status(get_national_stage())
+        except Exception as e:
+            logger.warning(f"National stage unavailable, keeping the last known one: {e}")
+        stage = self._stage
+        for area_id in area_ids:
+            if area_id is NATIONAL:
+                events = None
+            else:
+                try:
+                    events = get_area_events(area_id)
+                except Exception as e:
+                    logger.warning(f"Load-shedding events for {area_id} unavailable: {e}")
+                    continue
+            self._publish(area_id, {"area_id": area_id, "stage": stage, "events": events})
+        with self._lock:
+            self.polls += 1
+
+    def _publish(self, area_id, snapshot):
+        with self._lock:
+            previous = self._snapshots.get(area_id)
+            if previous is not None and all(previous[k] == snapshot[k] for k in ("stage", "events")):
+                return
+            snapshot["changed"] = [k for k in ("stage", "events")
+                                   if previous is None or previous[k] != snapshot[k]]
+            self._snapshots[area_id] = snapshot
+            subscribers = list(self._subscribers.get(area_id, ()))
+            self.published += 1
+        for q in subscribers:
+            try:
+                q.put_nowait(snapshot)
+            except queue.Full:
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+                q.put_nowait(snapshot)
+                with self._lock:
+                    self.dropped += 1
+
+    def stream(self, area_id=NATIONAL):
+        """Server-sent events for one client: an `update` per change plus keep-alives.
+
+        Subscribes immediately, so TooManySubscribersError is raised here
+        rather than once the response has started.
+        """
+        return self._events(area_id, self.subscribe(area_id))
+
+    def _events(self, area_id, q):
+        try:
+            while True:
+                try:
+                    snapshot = q.get(timeout=LOADSHEDDING_STREAM_KEEPALIVE)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: update\ndata: {json.dumps(snapshot)}\n\n"
+        finally:
+            self.unsubscribe(area_id, q)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "areas": len(self._subscribers),
+                "subscribers": sum(len(s) for s in self._subscribers.values()),
+                "polls": self.polls,
+                "published": self.published,
+                "dropped": self.dropped,
+                "rejected": self.rejected,
+                "max_subscribers": self.max_subscribers,
+                "interval_seconds": self.interval,
+            }
+
+
+broadcaster = LoadsheddingBroadcaster()
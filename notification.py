@@ -4,6 +4,8 @@ import requests
 import logging
 from dotenv import load_dotenv
 
+import http_client
+
 load_dotenv()
 
 ONESIGNAL_APP_ID = os.getenv("ONESIGNAL_APP_ID")
@@ -30,7 +32,7 @@ def send_push_notification(title, message, url=None):
         payload["url"] = url
 
     try:
-        response = requests.post(ONESIGNAL_API_URL, headers=HEADERS, json=payload)
+        response = http_client.post(ONESIGNAL_API_URL, headers=HEADERS, json=payload)
         response.raise_for_status()
         logger.info("Push notification sent successfully")
         return response.json()
@@ -47,7 +49,7 @@ def send_email_notification(email, subject, message):
         "email_body": message
     }
     try:
-        response = requests.post(ONESIGNAL_API_URL, headers=HEADERS, json=payload)
+        response = http_client.post(ONESIGNAL_API_URL, headers=HEADERS, json=payload)
         response.raise_for_status()
         logger.info("Email notification sent successfully")
         return response.json()
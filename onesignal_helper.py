@@ -1,7 +1,8 @@
 # utils/onesignal_helper.py
-import requests
 import os
 from dotenv import load_dotenv
+
+import http_client
 load_dotenv()
 
 ONESIGNAL_APP_ID = os.getenv("ONESIGNAL_APP_ID")
@@ -20,5 +21,5 @@ def get_subscribers():
     # The 'Basic Constraints of CA cert not marked critical' error suggests an issue with the
     # SSL certificate itself or the CA chain. The recommended solution is to fix the certificate
     # or update the system's trusted CA certificates.
-    response = requests.get(url, headers=headers, verify=False)
+    response = http_client.get(url, headers=headers, verify=False)
     return response.json()
@@ -0,0 +1,194 @@
+# solar_yield.py
+import os
+import sys
+import csv
+import logging
+import argparse
+import threading
+from collections import defaultdict
+
+import numpy as np
+from dotenv import load_dotenv
+
+from weather_service import AREA_COORDINATES, get_forecast, get_forecasts
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Share of nameplate output that survives inverter, wiring and soiling losses
+SOLAR_PERFORMANCE_RATIO = float(os.getenv("SOLAR_PERFORMANCE_RATIO", "0.8"))
+# Power change per degree of cell temperature above 25°C (crystalline silicon)
+SOLAR_TEMP_COEFFICIENT = float(os.getenv("SOLAR_TEMP_COEFFICIENT", "-0.004"))
+# Nominal operating cell temperature, used to estimate cell from air temperature
+SOLAR_NOCT = float(os.getenv("SOLAR_NOCT", "45"))
+# Average irradiance (kW/m²) assumed per sunshine hour when the forecast has no
+# radiation data, so daily yield can still be estimated from sunshine_duration
+SOLAR_SUNSHINE_IRRADIANCE = float(os.getenv("SOLAR_SUNSHINE_IRRADIANCE", "0.7"))
+STC_IRRADIANCE = 1000.0  # W/m²
+STC_CELL_TEMPERATURE = 25.0
+
+
+def _series(block, field):
+    """Forecast column as a float array, with missing values as NaN"""
+    return np.array([np.nan if v is None else v for v in block.get(field) or []], dtype=float)
+
+
+def hourly_unit_yield(hourly):
+    """kWh produced per kW of capacity in each forecast hour.
+
+    Uses shortwave radiation (W/m², hourly mean) and air temperature: cell
+    temperature is estimated with the NOCT model and output derated by
+    SOLAR_TEMP_COEFFICIENT for every degree above 25°C.
+    """
+    irradiance = np.nan_to_num(_series(hourly, "shortwave_radiation")).clip(min=0)
+    air_temperature = _series(hourly, "temperature_2m")
+    if len(air_temperature) != len(irradiance):
+        air_temperature = np.full(len(irradiance), STC_CELL_TEMPERATURE)
+    air_temperature = np.where(np.isnan(air_temperature), STC_CELL_TEMPERATURE, air_temperature)
+
+    cell_temperature = air_temperature + (SOLAR_NOCT - 20.0) / 800.0 * irradiance
+    derate = 1.0 + SOLAR_TEMP_COEFFICIENT * (cell_temperature - STC_CELL_TEMPERATURE)
+    return (irradiance / STC_IRRADIANCE * SOLAR_PERFORMANCE_RATIO * derate).clip(min=0)
+
+
+def build_profile(data):
+    """Per-kW yield profile for one area's raw forecast.
+
+    Returns {"times", "hourly", "dates", "daily"}, where "hourly" and
+    "daily" are arrays of kWh per kW of installed capacity.
+    """
+    hourly = data.get("hourly", {})
+    times = list(hourly.get("time") or [])
+    if any(v is not None for v in hourly.get("shortwave_radiation") or []):
+        unit = hourly_unit_yield(hourly)
+        dates, day_index = np.unique([t[:10] for t in times], return_inverse=True)
+        daily = np.bincount(day_index, weights=unit, minlength=len(dates))
+        return {"times": times, "hourly": unit, "dates": dates.tolist(), "daily": daily}
+
+    # Older cached forecasts carry no radiation; fall back to sunshine hours
+    block = data.get("daily", {})
+    sunshine_hours = np.nan_to_num(_series(block, "sunshine_duration")) / 3600.0
+    daily = sunshine_hours * SOLAR_SUNSHINE_IRRADIANCE * SOLAR_PERFORMANCE_RATIO
+    return {"times": [], "hourly": np.zeros(0), "dates": list(block.get("time") or []), "daily": daily}
+
+
+# Profiles are reused until the area's cached forecast changes, i.e. once per
+# area per upstream (hourly) update
+_profiles = {}
+_profiles_lock = threading.Lock()
+
+
+def area_profile(area_id, data=None):
+    """Cached per-kW yield profile for an area; see build_profile()"""
+    if data is None:
+        data = get_forecast(area_id)
+    with _profiles_lock:
+        cached = _profiles.get(area_id)
+    if cached is not None and cached[0] is data:
+        return cached[1]
+
+    profile = build_profile(data)
+    with _profiles_lock:
+        _profiles[area_id] = (data, profile)
+    return profile
+
+
+def estimate_system(area_id, capacity_kw):
+    """Hourly and daily kWh estimates for one system of `capacity_kw`"""
+    profile = area_profile(area_id)
+    capacity_kw = float(capacity_kw)
+    return {
+        "area_id": area_id,
+        "capacity_kw": capacity_kw,
+        "daily": [{"date": d, "kwh": round(float(kwh), 3)}
+                  for d, kwh in zip(profile["dates"], profile["daily"] * capacity_kw)],
+        "hourly": [{"time": t, "kwh": round(float(kwh), 3)}
+                   for t, kwh in zip(profile["times"], profile["hourly"] * capacity_kw)],
+    }
+
+
+def estimate_fleet(systems, include_hourly=False):
+    """Yield estimates for many systems at once.
+
+    `systems` yields (system_id, capacity_kw, area_id). Systems are grouped
+    by area, cold forecasts are fetched in one batch, and each area's
+    estimates are a single outer product of capacities and its profile.
+    Returns (estimates, errors); estimates maps area_id to {"system_ids",
+    "dates", "daily"} (and "times", "hourly" if requested), where
+    "daily"/"hourly" are arrays of shape (systems, days/hours).
+    """
+    groups = defaultdict(lambda: ([], []))
+    for system_id, capacity_kw, area_id in systems:
+        ids, capacities = groups[area_id]
+        ids.append(system_id)
+        capacities.append(float(capacity_kw))
+
+    errors = {a: "Unknown area" for a in groups if a not in AREA_COORDINATES}
+    forecasts, fetch_errors = get_forecasts([a for a in groups if a in AREA_COORDINATES])
+    errors.update({a: str(e) for a, e in fetch_errors.items()})
+
+    estimates = {}
+    for area_id, data in forecasts.items():
+        ids, capacities = groups[area_id]
+        capacities = np.asarray(capacities)
+        profile = area_profile(area_id, data)
+        estimate = {
+            "system_ids": ids,
+            "dates": profile["dates"],
+            "daily": np.outer(capacities, profile["daily"]),
+        }
+        if include_hourly:
+            estimate["times"] = profile["times"]
+            estimate["hourly"] = np.outer(capacities, profile["hourly"])
+        estimates[area_id] = estimate
+    return estimates, errors
+
+
+def fleet_summary(estimates, errors):
+    """JSON-ready per-area daily totals and per-system daily kWh"""
+    return {
+        "areas": {
+            area_id: {
+                "systems": len(e["system_ids"]),
+                "dates": e["dates"],
+                "total_kwh": np.round(e["daily"].sum(axis=0), 3).tolist(),
+            }
+            for area_id, e in estimates.items()
+        },
+        "systems": {
+            system_id: np.round(row, 3).tolist()
+            for e in estimates.values()
+            for system_id, row in zip(e["system_ids"], e["daily"])
+        },
+        "errors": errors,
+    }
+
+
+def write_csv(estimates, out):
+    """One row per system and day: system_id, area_id, date, kwh"""
+    writer = csv.writer(out)
+    writer.writerow(["system_id", "area_id", "date", "kwh"])
+    for area_id, e in estimates.items():
+        for system_id, row in zip(e["system_ids"], e["daily"]):
+            writer.writerows((system_id, area_id, d, f"{kwh:.3f}") for d, kwh in zip(e["dates"], row))
+
+
+if __name__ == "__main__":
+    from support import get_solar_systems
+
+    parser = argparse.ArgumentParser(description="Forecast daily generation for every registered solar system")
+    parser.add_argument("--areas", help="Comma-separated areaIds to limit the run to")
+    parser.add_argument("--output", help="CSV file to write (default: stdout)")
+    args = parser.parse_args()
+
+    area_ids = [a.strip().lower() for a in args.areas.split(",")] if args.areas else None
+    estimates, errors = estimate_fleet(get_solar_systems(area_ids))
+    for area_id, error in errors.items():
+        logger.error(f"Skipped {area_id}: {error}")
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            write_csv(estimates, f)
+    else:
+        write_csv(estimates, sys.stdout)
@@ -0,0 +1,122 @@
+# weather_prefetcher.py
+import os
+import random
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+from weather_service import AREA_COORDINATES, forecast_cache, seconds_until_refresh
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+WEATHER_PREFETCH_ENABLED = os.getenv("WEATHER_PREFETCH_ENABLED", "true").lower() == "true"
+# Each area's fetch is delayed by up to this many seconds to spread upstream load
+WEATHER_PREFETCH_JITTER = float(os.getenv("WEATHER_PREFETCH_JITTER", "30"))
+# Maximum simultaneous upstream requests per round
+WEATHER_PREFETCH_CONCURRENCY = int(os.getenv("WEATHER_PREFETCH_CONCURRENCY", "4"))
+
+
+class ForecastPrefetcher:
+    """Keeps forecast_cache warm for every area in AREA_COORDINATES.
+
+    Runs a daemon thread that refreshes every area once at start-up and then
+    just after each expected upstream update (seconds_until_refresh(), the
+    same schedule forecast entries expire on), so /api/weather is served
+    from memory. Refreshes go through forecast_cache, so they share any
+    in-flight load for the same area, and entries that are still fresh are
+    skipped.
+    """
+
+    def __init__(self, areas=None, jitter=WEATHER_PREFETCH_JITTER, concurrency=WEATHER_PREFETCH_CONCURRENCY):
+        self.areas = list(areas or AREA_COORDINATES)
+        self.jitter = jitter
+        self.concurrency = concurrency
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.rounds = 0
+        self.skipped = 0
+        self.last_success = {}
+        self.failures = {}
+        self.last_error = {}
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="forecast-prefetcher", daemon=True)
+            self._thread.start()
+        logger.info(f"Forecast prefetcher started for {len(self.areas)} areas")
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh_all()
+            # A second past the update, so every entry has expired by then
+            self._stop.wait(seconds_until_refresh() + 1)
+
+    def refresh_all(self):
+        """Refresh every area once, at most `concurrency` at a time"""
+        with ThreadPoolExecutor(max_workers=self.concurrency,
+                                thread_name_prefix="forecast-prefetch") as pool:
+            for area_id in self.areas:
+                pool.submit(self._refresh, area_id)
+        with self._lock:
+            self.rounds += 1
+
+    def _refresh(self, area_id):
+        if self._stop.wait(random.uniform(0, self.jitter)):
+            return
+        cached = forecast_cache.peek(area_id)
+        if cached is not None and cached[2]:
+            with self._lock:
+                self.skipped += 1
+            return
+        try:
+            forecast_cache.refresh(area_id)
+            with self._lock:
+                self.last_success[area_id] = time.time()
+        except Exception as e:
+            logger.warning(f"Forecast prefetch failed for {area_id}: {e}")
+            with self._lock:
+                self.failures[area_id] = self.failures.get(area_id, 0) + 1
+                self.last_error[area_id] = str(e)
+
+    def metrics(self):
+        now = time.time()
+        with self._lock:
+            return {
+                "rounds": self.rounds,
+                "skipped_fresh": self.skipped,
+                "next_round_seconds": round(seconds_until_refresh() + 1),
+                "areas": {
+                    area_id: {
+                        "refresh_age_seconds": (now - self.last_success[area_id]) if area_id in self.last_success else None,
+                        "failures": self.failures.get(area_id, 0),
+                        "last_error": self.last_error.get(area_id),
+                    }
+                    for area_id in self.areas
+                },
+            }
+
+
+prefetcher = ForecastPrefetcher()
+
+
+def start_prefetcher():
+    """Start the shared prefetcher unless disabled with WEATHER_PREFETCH_ENABLED=false.
+
+    Call it from the process entry point (or a WSGI server's post-fork
+    hook), not at import time, so importing the app does not start threads.
+    """
+    if WEATHER_PREFETCH_ENABLED:
+        prefetcher.start()
+    return prefetcher
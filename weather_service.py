@@ -0,0 +1,226 @@
+# weather_service.py
+import os
+import json
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+import http_client
+from ttl_cache import RefreshingCache
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+OPEN_METEO_API_URL = os.getenv("OPEN_METEO_API_URL", "https://api.open-meteo.com/v1/forecast")
+DAILY_FIELDS = "temperature_2m_max,temperature_2m_min,sunrise,sunset,daylight_duration,sunshine_duration,uv_index_max,uv_index_clear_sky_max"
+HOURLY_FIELDS = "temperature_2m,relative_humidity_2m,shortwave_radiation"
+
+# Open-Meteo refreshes its models hourly, so cached forecasts expire shortly
+# after the top of each hour rather than on a fixed interval
+WEATHER_REFRESH_OFFSET = int(os.getenv("WEATHER_REFRESH_OFFSET", "300"))
+# How long an expired forecast may still be served while it is refreshed
+WEATHER_STALE_TTL = int(os.getenv("WEATHER_STALE_TTL", "1800"))
+WEATHER_TIMEOUT = float(os.getenv("WEATHER_TIMEOUT", "10"))
+# Fraction of responses whose payload is written to the debug log
+WEATHER_LOG_SAMPLE_RATE = float(os.getenv("WEATHER_LOG_SAMPLE_RATE", "0.01"))
+DAILY_FORECAST_DAYS = 7
+# Locations per multi-location Open-Meteo request; larger batches are split
+# and the chunks fetched in parallel
+WEATHER_BATCH_MAX_LOCATIONS = int(os.getenv("WEATHER_BATCH_MAX_LOCATIONS", "50"))
+WEATHER_BATCH_CONCURRENCY = int(os.getenv("WEATHER_BATCH_CONCURRENCY", "4"))
+
+# (output key, Open-Meteo field) pairs for the reshaped payloads
+DAILY_COLUMNS = [
+    ("date", "time"),
+    ("temperature_2m_max", "temperature_2m_max"),
+    ("temperature_2m_min", "temperature_2m_min"),
+    ("sunshine_duration", "sunshine_duration"),
+    ("sunrise", "sunrise"),
+    ("sunset", "sunset"),
+    ("uv_index_max", "uv_index_max"),
+    ("daylight_duration", "daylight_duration"),
+]
+HOURLY_COLUMNS = [
+    ("time", "time"),
+    ("temperature_2m", "temperature_2m"),
+    ("relative_humidity_2m", "relative_humidity_2m"),
+    ("shortwave_radiation", "shortwave_radiation"),
+]
+FORECAST_FORMATS = ("rows", "columnar", "ndjson")
+
+AREA_COORDINATES = {
+    "johannesburg": {"latitude": -26.2041, "longitude": 28.0473},
+    "capetown": {"latitude": -33.9249, "longitude": 18.4241},
+    "durban": {"latitude": -29.8587, "longitude": 31.0218},
+    "pretoria": {"latitude": -25.7479, "longitude": 28.2293},
+    "bloemfontein": {"latitude": -29.0852, "longitude": 26.2159},
+    "polokwane": {"latitude": -23.9045, "longitude": 29.4688},
+    "nelspruit": {"latitude": -25.4773, "longitude": 30.9700},
+    "kimberley": {"latitude": -28.7383, "longitude": 24.7630},
+    "mafikeng": {"latitude": -25.8733, "longitude": 25.6713},
+    "gqeberha": {"latitude": -33.9611, "longitude": 25.6102},
+    "eastlondon": {"latitude": -33.0186, "longitude": 27.8942},
+}
+
+class WeatherFetchError(Exception):
+    """Raised when Open-Meteo answers with a non-200 status"""
+
+    def __init__(self, status_code, message):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def seconds_until_refresh():
+    """Seconds until the next expected upstream update (top of the hour + offset)"""
+    now = time.time()
+    next_update = now - (now % 3600) + WEATHER_REFRESH_OFFSET
+    if next_update <= now:
+        next_update += 3600
+    return next_update - now
+
+
+def fetch_forecast(area_id):
+    """Fetch the raw Open-Meteo forecast for a known area, bypassing the cache"""
+    coords = AREA_COORDINATES[area_id]
+    params = {
+        "latitude": coords["latitude"],
+        "longitude": coords["longitude"],
+        "daily": DAILY_FIELDS,
+        "hourly": HOURLY_FIELDS,
+        "timezone": "auto",
+    }
+    logger.info(f"Fetching weather for {area_id} from Open-Meteo")
+    response = http_client.get(OPEN_METEO_API_URL, params=params, timeout=WEATHER_TIMEOUT)
+    if response.status_code != 200:
+        logger.error(f"Weather API error: {response.status_code} {response.text}")
+        raise WeatherFetchError(response.status_code, "Failed to fetch weather")
+    return response.json()
+
+
+def _fetch_chunk(area_ids):
+    params = {
+        "latitude": ",".join(str(AREA_COORDINATES[a]["latitude"]) for a in area_ids),
+        "longitude": ",".join(str(AREA_COORDINATES[a]["longitude"]) for a in area_ids),
+        "daily": DAILY_FIELDS,
+        "hourly": HOURLY_FIELDS,
+        "timezone": "auto",
+    }
+    logger.info(f"Fetching weather for {len(area_ids)} areas from Open-Meteo")
+    response = http_client.get(OPEN_METEO_API_URL, params=params, timeout=WEATHER_TIMEOUT)
+    if response.status_code != 200:
+        logger.error(f"Weather API error: {response.status_code} {response.text}")
+        raise WeatherFetchError(response.status_code, "Failed to fetch weather")
+    data = response.json()
+    # Open-Meteo returns a list for several coordinates and an object for one
+    results = data if isinstance(data, list) else [data]
+    return dict(zip(area_ids, results))
+
+
+def fetch_forecasts(area_ids):
+    """Fetch several areas with multi-location requests, bypassing the cache.
+
+    Areas that could not be fetched are left out of the returned dict.
+    """
+    chunks = [area_ids[i:i + WEATHER_BATCH_MAX_LOCATIONS]
+              for i in range(0, len(area_ids), WEATHER_BATCH_MAX_LOCATIONS)]
+    if len(chunks) == 1:
+        return _fetch_chunk(chunks[0])
+
+    forecasts = {}
+    with ThreadPoolExecutor(max_workers=WEATHER_BATCH_CONCURRENCY) as pool:
+        for chunk, future in [(c, pool.submit(_fetch_chunk, c)) for c in chunks]:
+            try:
+                forecasts.update(future.result())
+            except Exception as e:
+                logger.warning(f"Batch weather fetch failed for {chunk}: {e}")
+    return forecasts
+
+
+forecast_cache = RefreshingCache(fetch_forecast, ttl=seconds_until_refresh,
+                                 stale_ttl=WEATHER_STALE_TTL, maxsize=len(AREA_COORDINATES) * 2)
+
+
+def get_forecast(area_id):
+    """Raw forecast for an area: cached, coalesced, and served stale while refreshing"""
+    return forecast_cache.get(area_id)
+
+
+def get_forecasts(area_ids):
+    """Raw forecasts for several areas; cold areas are fetched together.
+
+    Returns (forecasts, errors) keyed by area id.
+    """
+    return forecast_cache.get_many(area_ids, fetch_forecasts)
+
+
+def _columns(block, columns, limit=None):
+    """Parallel arrays for `columns`, truncated to `limit` and padded with None"""
+    length = len(block.get("time") or [])
+    if limit is not None:
+        length = min(length, limit)
+    shaped = {}
+    for key, field in columns:
+        values = list((block.get(field) or [])[:length])
+        shaped[key] = values + [None] * (length - len(values))
+    return shaped
+
+
+def _rows(columnar):
+    keys = list(columnar)
+    return [dict(zip(keys, values)) for values in zip(*columnar.values())]
+
+
+def to_columnar(data):
+    """Forecast as parallel arrays: {"daily": {field: [...]}, "hourly": {field: [...]}}"""
+    return {
+        "daily": _columns(data.get("daily", {}), DAILY_COLUMNS, DAILY_FORECAST_DAYS),
+        "hourly": _columns(data.get("hourly", {}), HOURLY_COLUMNS),
+    }
+
+
+def to_rows(data):
+    """Forecast as lists of per-day / per-hour dicts (the original /api/weather shape)"""
+    columnar = to_columnar(data)
+    return {
+        "daily_forecast": _rows(columnar["daily"]),
+        "hourly_forecast": _rows(columnar["hourly"]),
+    }
+
+
+def to_ndjson(data):
+    """Yield one JSON line per day, then one per hour, each tagged with its type"""
+    rows = to_rows(data)
+    for kind, key in (("daily", "daily_forecast"), ("hourly", "hourly_forecast")):
+        for row in rows[key]:
+            yield json.dumps({"type": kind, **row}) + "\n"
+
+
+# Reshaped payloads are reused until the underlying forecast object changes
+_shaped = {}
+_shaped_lock = threading.Lock()
+
+
+def shape_forecast(area_id, data, layout="rows"):
+    """Reshape a raw forecast by to_rows() or to_columnar(), reusing earlier results"""
+    key = (area_id, layout)
+    with _shaped_lock:
+        cached = _shaped.get(key)
+    if cached is not None and cached[0] is data:
+        return cached[1]
+
+    payload = to_columnar(data) if layout == "columnar" else to_rows(data)
+    with _shaped_lock:
+        _shaped[key] = (data, payload)
+    if logger.isEnabledFor(logging.DEBUG) and random.random() < WEATHER_LOG_SAMPLE_RATE:
+        logger.debug(f"Sampled {layout} forecast for {area_id}: {payload}")
+    return payload
+
+
+def get_shaped_forecast(area_id, layout="rows"):
+    """Cached forecast for an area, reshaped by to_rows() or to_columnar()"""
+    return shape_forecast(area_id, get_forecast(area_id), layout)